@@ -0,0 +1,428 @@
+"""Замеры производительности анализатора на сгенерированных таблицах констант.
+
+Запуск: python benchmark.py [имя_замера ...]
+Без аргументов выполняются все замеры.
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from external_semantics import analyze_semantics_external
+from incremental import IncrementalLexer, IncrementalParser
+from lexical_analyzer import LexicalAnalyzer
+from parser import Parser, write_syntax_tree
+from semantic_batch import analyze_semantics_batch
+from symbol_table import SymbolTable
+from semantic_analysis import (analyze_semantics, analyze_semantics_from_parse,
+                               build_ast_from_syntax_tree, format_ast_single_tree,
+                               recognize, write_ast)
+
+TYPES = ('i8', 'i16', 'i32', 'i64', 'i128', 'u8', 'u16', 'u32', 'u64', 'u128')
+
+
+def generate_constants(count):
+    """Корректная таблица из count объявлений, по одному на строку."""
+    lines = []
+    for i in range(count):
+        lines.append(f"const CONST_{i}: {TYPES[i % len(TYPES)]} = {i % 100};")
+    return '\n'.join(lines)
+
+
+def _traced_bytes(func):
+    """Прирост памяти Python-кучи, удерживаемый результатом func()."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = func()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return after - before, result
+
+
+def _peak_bytes(func):
+    """Пиковый прирост памяти Python-кучи во время func()."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return peak - before
+
+
+def _best_time(func, repeat=3):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def bench_lexer_engines(count=100_000):
+    text = generate_constants(count)
+    print(f"Лексер: {count} объявлений, {len(text) / 1e6:.1f} МБ")
+    for engine in LexicalAnalyzer.ENGINES:
+        analyzer = LexicalAnalyzer(engine=engine)
+        elapsed, tokens = _best_time(lambda: analyzer.analyze(text))
+        print(f"  {engine:>8}: {len(tokens) / elapsed:>12,.0f} лексем/с ({elapsed:.3f} с)")
+
+
+def bench_token_memory(count=100_000):
+    text = generate_constants(count)
+    analyzer = LexicalAnalyzer()
+    print(f"Память лексем: {count} объявлений")
+    size, tokens = _traced_bytes(lambda: analyzer.analyze(text))
+    print(f"  list[Token]: {size / len(tokens):>7.1f} байт/лексему")
+    del tokens
+    size, buffer = _traced_bytes(lambda: analyzer.analyze_to_buffer(text))
+    print(f"  TokenBuffer: {size / len(buffer):>7.1f} байт/лексему "
+          f"(колонки: {buffer.nbytes / len(buffer):.1f})")
+    elapsed, buffer = _best_time(lambda: analyzer.analyze_to_buffer(text))
+    print(f"  TokenBuffer: {len(buffer) / elapsed:>12,.0f} лексем/с")
+
+
+def bench_trivia_free(count=50_000):
+    text = generate_constants(count)
+    print(f"Полный анализ: {count} объявлений")
+    for trivia_free in (False, True):
+        elapsed, _ = _best_time(lambda: analyze_semantics(text, trivia_free=trivia_free))
+        size, tokens = _traced_bytes(lambda: LexicalAnalyzer(skip_trivia=trivia_free).analyze(text))
+        print(f"  trivia_free={trivia_free!s:<5}: {elapsed:.3f} с, "
+              f"{len(tokens)} лексем, {size / 1e6:.1f} МБ")
+
+
+def bench_incremental_lexer(count=200_000):
+    text = generate_constants(count)
+    analyzer = LexicalAnalyzer()
+    print(f"Инкрементальный лексер: {count} строк, правка одной строки")
+    elapsed, _ = _best_time(lambda: analyzer.analyze(text), repeat=1)
+    print(f"  полный разбор: {elapsed:.3f} с")
+    session = IncrementalLexer(analyzer)
+    session.reset(text)
+    middle = count // 2
+    edit_elapsed, _ = _best_time(lambda: session.edit(middle, middle, "const EDITED: i32 = 1;"))
+    shift_elapsed, _ = _best_time(
+        lambda: session.edit(middle, middle, "const EDITED: i32 = 1;\nconst ADDED: i32 = 2;"))
+    start = time.perf_counter()
+    tokens = session.tokens
+    collect_elapsed = time.perf_counter() - start
+    print(f"  правка строки: {edit_elapsed * 1e3:.3f} мс; "
+          f"со сдвигом строк: {shift_elapsed * 1e3:.1f} мс; "
+          f"сборка списка ({len(tokens)} лексем): {collect_elapsed * 1e3:.1f} мс")
+
+
+def bench_parallel_lexer(count=400_000):
+    text = generate_constants(count)
+    analyzer = LexicalAnalyzer(engine='regex')
+    print(f"Параллельный лексер: {count} объявлений, {len(text) / 1e6:.1f} МБ")
+    for workers in (1, 2, 4, 8):
+        elapsed, buffer = _best_time(
+            lambda: analyzer.analyze_parallel(text, workers=workers, min_chunk_chars=1 << 16),
+            repeat=1)
+        print(f"  {workers} проц.: {elapsed:.3f} с, {len(buffer) / elapsed:>12,.0f} лексем/с")
+
+
+def bench_mapped_file(count=200_000):
+    text = generate_constants(count)
+    analyzer = LexicalAnalyzer(engine='regex')
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.txt', delete=False) as file:
+        file.write(text)
+        path = file.name
+    try:
+        print(f"Анализ файла: {count} объявлений, {os.path.getsize(path) / 1e6:.1f} МБ")
+
+        def read_and_analyze():
+            with open(path, 'r', encoding='utf-8') as source:
+                return analyzer.analyze(source.read())
+
+        elapsed, tokens = _best_time(read_and_analyze)
+        print(f"  чтение в str: {elapsed:.3f} с, {len(tokens)} лексем")
+        elapsed, tokens = _best_time(lambda: analyzer.analyze_file(path))
+        print(f"  mmap:         {elapsed:.3f} с, {len(tokens)} лексем")
+        size, count_only = _traced_bytes(
+            lambda: sum(1 for _ in analyzer.iter_file_tokens(path)))
+        print(f"  mmap, потоком: {count_only} лексем, удерживается {size / 1e3:.1f} КБ")
+    finally:
+        os.remove(path)
+
+
+def bench_error_budget(size=200_000, max_errors=1000):
+    # Детерминированный «двоичный мусор»: байты 0..255 как latin-1
+    junk = bytes((i * 131 + 7) % 256 for i in range(size)).decode('latin-1')
+    print(f"Мусорный ввод: {size / 1e3:.0f} тыс. символов")
+    elapsed, result = _best_time(lambda: analyze_semantics(junk), repeat=1)
+    print(f"  без лимита:         {elapsed:.3f} с, {len(result[3])} ошибок")
+    elapsed, result = _best_time(lambda: analyze_semantics(junk, max_errors=max_errors))
+    print(f"  max_errors={max_errors}: {elapsed * 1e3:.1f} мс, {len(result[3])} ошибок")
+
+
+def bench_long_statement(sizes=(10_000, 100_000)):
+    # Один оператор без ';': каждый пропущенный токен раньше пересканировал хвост
+    print("Длинный оператор без ';'")
+    analyzer = LexicalAnalyzer(skip_trivia=True)
+    sources = {
+        "мусор перед ':'": lambda n: "const A " + "1 " * n + ": i32 = 5",
+        "мусор перед именем": lambda n: "const " + "= " * n + "X",
+    }
+    for label, make in sources.items():
+        for size in sizes:
+            tokens = analyzer.analyze(make(size))
+            elapsed, _ = _best_time(lambda: Parser().parse(tokens, trivia_free=True), repeat=1)
+            print(f"  {label}, {len(tokens)} лексем: {elapsed:.3f} с")
+
+
+def bench_float_errors(sizes=(5_000, 50_000)):
+    # Для каждого дробного числа пред-проход раньше копировал хвост списка лексем
+    print("Дробные литералы (лексические ошибки)")
+    analyzer = LexicalAnalyzer()
+    for size in sizes:
+        tokens = analyzer.analyze("const A: i32 = 1.5;\n" * size)
+        elapsed, _ = _best_time(lambda: Parser().parse(tokens), repeat=1)
+        print(f"  {size} объявлений, {len(tokens)} лексем: {elapsed:.3f} с")
+
+
+def bench_parallel_parser(count=200_000):
+    tokens = LexicalAnalyzer(skip_trivia=True).analyze(generate_constants(count))
+    print(f"Параллельный парсер: {count} объявлений, {len(tokens)} лексем")
+    elapsed, _ = _best_time(lambda: Parser().parse(tokens, trivia_free=True), repeat=1)
+    print(f"  последовательно: {elapsed:.3f} с")
+    for workers in (2, 4, 8):
+        elapsed, _ = _best_time(
+            lambda: Parser().parse_parallel(tokens, trivia_free=True, workers=workers,
+                                            min_shard_tokens=1 << 14),
+            repeat=1)
+        print(f"  {workers} проц.: {elapsed:.3f} с")
+
+
+def bench_incremental_parser(count=100_000):
+    text = generate_constants(count)
+    print(f"Инкрементальный парсер: {count} объявлений, правка одной строки")
+    session = IncrementalParser()
+    elapsed, _ = _best_time(lambda: session.reset(text), repeat=1)
+    print(f"  reset (лексер и разбор): {elapsed:.3f} с")
+    tokens = session.tokens
+    elapsed, _ = _best_time(lambda: Parser().parse(tokens), repeat=1)
+    print(f"  Parser.parse целиком:    {elapsed:.3f} с")
+    middle = count // 2
+    edit_elapsed, _ = _best_time(lambda: session.edit(middle, middle, "const EDITED: i32 = 1;"))
+    shift_elapsed, _ = _best_time(
+        lambda: session.edit(middle, middle, "const EDITED: i32 = 1;\nconst ADDED: i32 = 2;"))
+    print(f"  правка строки: {edit_elapsed * 1e3:.1f} мс; со сдвигом строк: {shift_elapsed * 1e3:.1f} мс")
+
+
+def bench_parser_engines(count=100_000):
+    tokens = LexicalAnalyzer().analyze(generate_constants(count))
+    print(f"Парсер: {count} объявлений, {len(tokens)} лексем")
+    for engine in Parser.ENGINES:
+        elapsed, _ = _best_time(lambda: Parser(engine=engine).parse(tokens))
+        print(f"  {engine:>9}: {count / elapsed:>10,.0f} объявлений/с ({elapsed:.3f} с)")
+
+
+def bench_syntax_arena(count=1_000_000):
+    text = generate_constants(count)
+    tokens = LexicalAnalyzer(skip_trivia=True).analyze(text)
+    print(f"Память дерева разбора: {count} объявлений, исходный текст {len(text) / 1e6:.1f} МБ")
+    for arena in (False, True):
+        parser = Parser(engine='table', arena=arena)
+        size, tree = _traced_bytes(lambda: parser.parse(tokens, trivia_free=True)[0])
+        label = 'SyntaxArena' if arena else 'SyntaxTreeNode'
+        print(f"  {label:>14}: {size / 1e6:>7.1f} МБ, {size / count:>6.1f} байт/объявление")
+        del tree
+        parser.significant_tokens = []
+
+
+def bench_recognize(count=100_000):
+    text = generate_constants(count)
+    broken = text + "\nconst BROKEN i32 = 1;"
+    print(f"Проверка корректности: {count} объявлений")
+    elapsed, _ = _best_time(lambda: analyze_semantics(text, trivia_free=True), repeat=1)
+    print(f"  analyze_semantics:         {elapsed:.3f} с")
+    elapsed, (ok, _) = _best_time(lambda: recognize(text))
+    print(f"  recognize:                 {elapsed:.3f} с ({ok})")
+    elapsed, (ok, _) = _best_time(lambda: recognize(broken))
+    print(f"  recognize, ошибка в конце: {elapsed:.3f} с ({ok})")
+
+
+def bench_tree_rendering(count=200_000):
+    tree, _ = Parser(engine='table').parse(LexicalAnalyzer().analyze(generate_constants(count)))
+    program = build_ast_from_syntax_tree(tree)
+    print(f"Вывод деревьев: {count} объявлений")
+    with open(os.devnull, 'w', encoding='utf-8') as sink:
+        renderers = {
+            "str(tree)": lambda: sink.write(str(tree)),
+            "write_syntax_tree": lambda: write_syntax_tree(tree, sink),
+            "format_ast_single_tree": lambda: sink.write(format_ast_single_tree(program)),
+            "write_ast": lambda: write_ast(program, sink),
+        }
+        for label, render in renderers.items():
+            elapsed, _ = _best_time(render, repeat=1)
+            peak = _peak_bytes(render)
+            print(f"  {label:>22}: {elapsed:.3f} с, пик памяти {peak / 1e6:.1f} МБ")
+
+
+def bench_stream_parser(count=200_000):
+    text = generate_constants(count)
+    analyzer = LexicalAnalyzer(skip_trivia=True)
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.txt', delete=False) as file:
+        file.write(text)
+        path = file.name
+    del text
+    try:
+        print(f"Потоковый парсер: {count} объявлений, {os.path.getsize(path) / 1e6:.1f} МБ")
+
+        def whole():
+            with open(path, 'r', encoding='utf-8') as source:
+                tokens = analyzer.analyze(source.read())
+            return Parser(engine='table').parse(tokens, trivia_free=True)
+
+        def streamed():
+            with open(path, 'r', encoding='utf-8') as source:
+                declarations = Parser(engine='table').iter_declarations(
+                    analyzer.iter_tokens(source), trivia_free=True)
+                return sum(1 for _ in declarations)
+
+        for label, run in (("parse", whole), ("iter_declarations", streamed)):
+            elapsed, _ = _best_time(run, repeat=1)
+            peak = _peak_bytes(run)
+            print(f"  {label:>17}: {elapsed:.3f} с, пик памяти {peak / 1e6:.1f} МБ")
+    finally:
+        os.remove(path)
+
+
+def bench_parser_profile(count=50_000):
+    # Половина объявлений с ошибками: работают процедуры восстановления
+    text = '\n'.join(f"const A{i} i32 = ;" if i % 2 else f"const A{i}: i32 = {i};"
+                     for i in range(count))
+    tokens = LexicalAnalyzer().analyze(text)
+    print(f"Профилирование парсера: {count} объявлений")
+    for profile in (False, True):
+        elapsed, _ = _best_time(lambda: Parser(profile=profile).parse(tokens))
+        print(f"  profile={profile!s:<5}: {elapsed:.3f} с")
+    parser = Parser(profile=True)
+    parser.parse(tokens)
+    print(parser.profile_report())
+
+
+def bench_semantic(count=100_000):
+    tokens = LexicalAnalyzer().analyze(generate_constants(count))
+    parser = Parser(engine='table')
+    print(f"Семантический проход: {count} объявлений")
+    elapsed, (tree, errors) = _best_time(lambda: parser.parse(tokens, collect_refs=True), repeat=1)
+    print(f"  разбор:                          {elapsed:.3f} с")
+    elapsed, _ = _best_time(lambda: analyze_semantics_from_parse(
+        tokens, tree, errors, chunk_refs=parser.chunk_refs))
+    print(f"  семантика (chunk_refs парсера):  {elapsed:.3f} с")
+    elapsed, _ = _best_time(lambda: analyze_semantics_from_parse(tokens, tree, errors))
+    print(f"  семантика (ссылки из лексем):    {elapsed:.3f} с")
+
+
+def bench_semantic_batch(count=300_000):
+    # Каждое десятое имя повторяется, каждое седьмое значение не влезает в i8,
+    # каждое пятидесятое объявление ссылается на предыдущее имя
+    lines = []
+    for i in range(count):
+        name = f"CONST_{i - 5 if i % 10 == 9 else i}"
+        value = f"CONST_{i - 1}" if i % 50 == 49 else 300 if i % 7 == 0 else i % 100
+        lines.append(f"const {name}: {TYPES[i % len(TYPES)] if i % 7 else 'i8'} = {value};")
+    tokens = LexicalAnalyzer(skip_trivia=True).analyze('\n'.join(lines))
+    print(f"Пакетная семантика: {count} объявлений")
+    for arena in (False, True):
+        parser = Parser(engine='table', arena=arena)
+        tree, errors = parser.parse(tokens, trivia_free=True, collect_refs=True)
+        label = 'SyntaxArena' if arena else 'SyntaxTreeNode'
+        for name, analyze in (('обычный', analyze_semantics_from_parse),
+                              ('пакетный', analyze_semantics_batch)):
+            elapsed, _ = _best_time(lambda: analyze(
+                tokens, tree, errors, trivia_free=True, chunk_refs=parser.chunk_refs))
+            print(f"  {label:>14}, {name:>8}: {elapsed:.3f} с")
+
+
+def bench_symbol_table(count=10_000_000, dict_count=1_000_000):
+    print(f"Таблица имён: {count} имён (словарь — на {dict_count})")
+    symbols = {}
+    for i in range(dict_count):
+        symbols[f"CONST_{i}"] = (i + 1, 7)
+    size = sys.getsizeof(symbols) + sum(
+        sys.getsizeof(name) + sys.getsizeof(pos) + sys.getsizeof(pos[0]) for name, pos in symbols.items())
+    print(f"  dict[str, (строка, столбец)]: {size / dict_count:>6.1f} байт/имя")
+    del symbols
+    table = SymbolTable()
+    start = time.perf_counter()
+    for i in range(count):
+        table.add(f"CONST_{i}", i + 1, 7)
+    elapsed = time.perf_counter() - start
+    print(f"  SymbolTable:                  {table.nbytes / count:>6.1f} байт/имя, "
+          f"заполнение {elapsed:.1f} с")
+    start = time.perf_counter()
+    found = sum(f"CONST_{i}" in table for i in range(0, count, 10))
+    print(f"  поиск каждого 10-го имени:    {time.perf_counter() - start:.2f} с ({found} найдено)")
+
+
+def bench_external_semantics(count=100_000, run_size=10_000):
+    # Каждое десятое имя повторяет более раннее: повторы ищутся слиянием пачек
+    lines = []
+    for i in range(count):
+        name = f"CONST_{i // 2 if i % 10 == 9 else i}"
+        lines.append(f"const {name}: {TYPES[i % len(TYPES)]} = {i % 200};")
+    analyzer = LexicalAnalyzer(skip_trivia=True)
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.txt', delete=False) as file:
+        file.write('\n'.join(lines))
+        path = file.name
+    del lines
+    try:
+        print(f"Внешняя семантика: {count} объявлений, пачки по {run_size}")
+
+        def in_memory():
+            with open(path, 'r', encoding='utf-8') as source:
+                return len(analyze_semantics(source.read(), trivia_free=True)[2])
+
+        def external():
+            with open(path, 'r', encoding='utf-8') as source:
+                return len(analyze_semantics_external(
+                    analyzer.iter_tokens(source), trivia_free=True, run_size=run_size)[1])
+
+        for label, run in (("analyze_semantics", in_memory), ("external", external)):
+            elapsed, errors = _best_time(run, repeat=1)
+            peak = _peak_bytes(run)
+            print(f"  {label:>17}: {elapsed:.3f} с, пик памяти {peak / 1e6:.1f} МБ, {errors} ошибок")
+    finally:
+        os.remove(path)
+
+
+BENCHMARKS = {
+    'lexer': bench_lexer_engines,
+    'token-memory': bench_token_memory,
+    'trivia': bench_trivia_free,
+    'incremental-lexer': bench_incremental_lexer,
+    'parallel-lexer': bench_parallel_lexer,
+    'mapped-file': bench_mapped_file,
+    'error-budget': bench_error_budget,
+    'parser': bench_parser_engines,
+    'long-statement': bench_long_statement,
+    'float-errors': bench_float_errors,
+    'parallel-parser': bench_parallel_parser,
+    'incremental-parser': bench_incremental_parser,
+    'recognize': bench_recognize,
+    'syntax-arena': bench_syntax_arena,
+    'tree-rendering': bench_tree_rendering,
+    'stream-parser': bench_stream_parser,
+    'parser-profile': bench_parser_profile,
+    'semantic': bench_semantic,
+    'semantic-batch': bench_semantic_batch,
+    'symbol-table': bench_symbol_table,
+    'external-semantics': bench_external_semantics,
+}
+
+
+if __name__ == '__main__':
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        BENCHMARKS[name]()
@@ -0,0 +1,188 @@
+"""Диагностики анализатора: стабильные коды и тексты на поддерживаемых языках.
+
+Ошибки (ParserError, SemanticError) хранят член Diagnostic и кортеж аргументов;
+текст собирается только при обращении к нему и на нужном языке — подсчёт
+и выгрузка кодов обходятся без форматирования строк.
+"""
+from enum import Enum
+
+LANGUAGES = ('ru', 'en')
+DEFAULT_LANGUAGE = 'ru'
+
+
+class Diagnostic(Enum):
+    # Лексические ошибки (сообщает парсер при пред-проходе)
+    INVALID_CHARACTER = (
+        "L001",
+        "Лексическая ошибка: недопустимый символ '{0}'",
+        "Lexical error: invalid character '{0}'")
+    FLOAT_LITERAL = (
+        "L002",
+        "Дробное число '{0}' недопустимо: используйте целое число",
+        "Fractional number '{0}' is not allowed: use an integer")
+
+    # Синтаксические ошибки
+    # Готовый текст (прежний вызов ParserError(фрагмент, строка, позиция, описание))
+    SYNTAX_MESSAGE = (
+        "P000",
+        "{0}",
+        "{0}")
+    MISSING_CONST = (
+        "P001",
+        "Пропущено ключевое слово 'const'",
+        "Missing keyword 'const'")
+    CONST_EXPECTED = (
+        "P002",
+        "Ожидается ключевое слово 'const', найдено '{0}'",
+        "Expected keyword 'const', found '{0}'")
+    CONST_EXPECTED_NOT_TYPE = (
+        "P003",
+        "В начале объявления константы ожидается ключевое слово 'const', а не тип данных '{0}'",
+        "A constant declaration must start with keyword 'const', not data type '{0}'")
+    CONST_EXPECTED_NOT_TOKEN = (
+        "P004",
+        "В начале объявления константы ожидается ключевое слово 'const', а не '{0}'",
+        "A constant declaration must start with keyword 'const', not '{0}'")
+    NUMBER_AS_IDENTIFIER = (
+        "P005",
+        "Числовой литерал нельзя использовать вместо идентификатора",
+        "A numeric literal cannot be used as an identifier")
+    EXTRA_SEMICOLONS_BEFORE_NAME = (
+        "P006",
+        "Лишние точки с запятой ({0} шт.) перед именем константы",
+        "Extra semicolons ({0}) before the constant name")
+    EXTRA_SEMICOLON_BEFORE_NAME = (
+        "P007",
+        "Лишняя точка с запятой перед именем константы",
+        "Extra semicolon before the constant name")
+    UNEXPECTED_TOKEN_IDENTIFIER_EXPECTED = (
+        "P008",
+        "Неожиданный токен '{0}', ожидается идентификатор",
+        "Unexpected token '{0}', identifier expected")
+    TYPE_AS_IDENTIFIER = (
+        "P009",
+        "Запрещено использовать тип данных '{0}' вместо идентификатора",
+        "Data type '{0}' cannot be used as an identifier")
+    REPEATED_CONST = (
+        "P010",
+        "Ожидается имя константы (идентификатор), нельзя повторять 'const'",
+        "Expected the constant name (identifier); 'const' cannot be repeated")
+    IDENTIFIER_EXPECTED = (
+        "P011",
+        "Ожидается идентификатор",
+        "Identifier expected")
+    UNEXPECTED_TOKEN_BEFORE_COLON = (
+        "P012",
+        "Неожиданный токен '{0}' перед ':'",
+        "Unexpected token '{0}' before ':'")
+    EXTRA_IDENTIFIER = (
+        "P013",
+        "Лишний идентификатор: имя константы может быть только одним; "
+        "ожидается ':' перед типом данных",
+        "Extra identifier: a constant has a single name; ':' expected before the data type")
+    MISSING_COLON_BEFORE_TYPE = (
+        "P014",
+        "Пропущен символ ':' между именем константы и типом данных",
+        "Missing ':' between the constant name and the data type")
+    MISSING_COLON = (
+        "P015",
+        "Пропущен ':'",
+        "Missing ':'")
+    ASSIGN_BEFORE_TYPE = (
+        "P016",
+        "Неожиданный токен '=' перед типом данных",
+        "Unexpected token '=' before the data type")
+    UNEXPECTED_TOKEN_BEFORE_TYPE = (
+        "P017",
+        "Неожиданный токен '{0}' перед типом данных",
+        "Unexpected token '{0}' before the data type")
+    TYPE_EXPECTED = (
+        "P018",
+        "Ожидается тип данных (i8, i16, i32, i64, u8, u16, u32, u64...)",
+        "Data type expected (i8, i16, i32, i64, u8, u16, u32, u64...)")
+    UNEXPECTED_TOKEN_BEFORE_ASSIGN = (
+        "P019",
+        "Неожиданный токен '{0}' перед '='",
+        "Unexpected token '{0}' before '='")
+    EXTRA_SEMICOLON_BEFORE_ASSIGN = (
+        "P020",
+        "Лишняя точка с запятой перед '='",
+        "Extra semicolon before '='")
+    MISSING_ASSIGN = (
+        "P021",
+        "Пропущен '='",
+        "Missing '='")
+    UNEXPECTED_TOKEN_BEFORE_NUMBER = (
+        "P022",
+        "Неожиданный токен '{0}' перед числом",
+        "Unexpected token '{0}' before the number")
+    EXTRA_SEMICOLON_BEFORE_NUMBER = (
+        "P023",
+        "Лишняя точка с запятой перед числовым литералом",
+        "Extra semicolon before the numeric literal")
+    NUMBER_EXPECTED = (
+        "P024",
+        "Ожидается числовой литерал",
+        "Numeric literal expected")
+    UNEXPECTED_TOKEN_BEFORE_SEMICOLON = (
+        "P025",
+        "Неожиданный токен '{0}' перед ';'",
+        "Unexpected token '{0}' before ';'")
+    MISSING_SEMICOLON = (
+        "P026",
+        "Пропущен ';'",
+        "Missing ';'")
+    UNEXPECTED_TOKEN = (
+        "P027",
+        "Неожиданный токен '{0}'",
+        "Unexpected token '{0}'")
+    UNEXPECTED_SEQUENCE = (
+        "P028",
+        "Неожиданная последовательность символов '{0}'",
+        "Unexpected character sequence '{0}'")
+    REPEATED_OPERATOR = (
+        "P029",
+        "Повторяющийся оператор '{0}' ({1} раз)",
+        "Repeated operator '{0}' ({1} times)")
+    ERROR_LIMIT_EXCEEDED = (
+        "P030",
+        "Анализ прерван: превышен лимит ошибок ({0})",
+        "Analysis stopped: error limit exceeded ({0})")
+    ANALYSIS_STOPPED = (
+        "P031",
+        "Анализ прерван: превышен лимит ошибок",
+        "Analysis stopped: error limit exceeded")
+
+    # Семантические ошибки
+    # Готовый текст (прежний вызов SemanticError(сообщение, строка, столбец))
+    SEMANTIC_MESSAGE = (
+        "S000",
+        "{0}",
+        "{0}")
+    DUPLICATE_IDENTIFIER = (
+        "S001",
+        'Ошибка: идентификатор "{0}" уже объявлен ранее (строка {1})',
+        'Error: identifier "{0}" is already declared (line {1})')
+    VALUE_OUT_OF_RANGE = (
+        "S002",
+        "Ошибка: значение {0} вне допустимого диапазона для типа {1} "
+        "([{2}, {3}]); несовместимость типа инициализатора",
+        "Error: value {0} is out of range for type {1} "
+        "([{2}, {3}]); initializer type mismatch")
+    UNKNOWN_TYPE = (
+        "S003",
+        "Ошибка: неизвестный тип {0} для проверки диапазона",
+        "Error: unknown type {0} for the range check")
+    UNDECLARED_IDENTIFIER = (
+        "S004",
+        'Ошибка: идентификатор "{0}" используется без предшествующего объявления',
+        'Error: identifier "{0}" is used before its declaration')
+
+    def __init__(self, code, ru, en):
+        self.code = code
+        self.templates = {'ru': ru, 'en': en}
+
+    def render(self, args=(), language=None):
+        """Текст диагностики с аргументами args на языке language (по умолчанию — русском)."""
+        template = self.templates.get(language or DEFAULT_LANGUAGE, self.templates[DEFAULT_LANGUAGE])
+        return template.format(*args)
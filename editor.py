@@ -1,13 +1,16 @@
 import sys
 import os
+import io
 import re
+import weakref
 from PyQt6.QtWidgets import *
 from PyQt6.QtCore import *
 from PyQt6.QtGui import *
 from lexical_analyzer import LexicalAnalyzer, TokenType
-from parser import Parser, ParserError
+from incremental import IncrementalLexer, IncrementalParser
+from parser import ParserError
 from search_engine import SearchEngine, SearchType, SearchResult
-from semantic_analysis import analyze_semantics_from_parse, format_ast_single_tree
+from semantic_analysis import analyze_semantics_from_parse, write_ast
 
 TEXTEDITOR_SEARCH_PRESETS = (
     (r"^\d*[0-46-9]$", "search_preset_nums_no5"),
@@ -18,6 +21,15 @@ TEXTEDITOR_SEARCH_PRESETS = (
     ),
 )
 
+# Бюджет ошибок синтаксического анализа: больше строк таблица ошибок не получит
+SYNTAX_ERROR_LIMIT = 1000
+# Сколько лексем выводится в таблицу лексического анализа: на вставленном
+# двоичном мусоре строк QTableWidgetItem иначе набираются миллионы
+LEXICAL_TABLE_ROW_LIMIT = 20000
+# Сколько строк AST выводится на вкладку семантики: дерево огромной программы
+# не собирается в одну строку целиком
+AST_OUTPUT_LINE_LIMIT = 20000
+
 
 class LineNumberArea(QWidget):
     def __init__(self, editor):
@@ -110,6 +122,9 @@ class TextEditor(QMainWindow):
         self.font_size = 12
         self.current_language = self.load_language()
         self.analyzer = LexicalAnalyzer()
+        # Инкрементальные сессии анализа по вкладкам: F5 пересканирует и переразбирает
+        # только изменённые строки
+        self.analysis_sessions = weakref.WeakKeyDictionary()
         self.current_search_results = []
         self.current_result_index = -1
         self.initUI()
@@ -719,6 +734,8 @@ class TextEditor(QMainWindow):
                 "Описание ошибки": "Описание ошибки",
                 "Всего лексем: {} | Лексических ошибок: {} | Синтаксических ошибок: {}": "Всего лексем: {} | Лексических ошибок: {} | Синтаксических ошибок: {}",
                 "Всего лексем: {} | Лексических: {} | Синтаксических: {} | Семантических: {}": "Всего лексем: {} | Лексических: {} | Синтаксических: {} | Семантических: {}",
+                "... показаны первые {} строк AST": "... показаны первые {} строк AST",
+                "... показаны первые {} лексем из {}": "... показаны первые {} лексем из {}",
                 "Семантика и AST": "Семантика и AST",
                 
                 "Поиск": "Поиск",
@@ -859,6 +876,8 @@ class TextEditor(QMainWindow):
                 "Описание ошибки": "Error Description",
                 "Всего лексем: {} | Лексических ошибок: {} | Синтаксических ошибок: {}": "Total tokens: {} | Lexical errors: {} | Syntax errors: {}",
                 "Всего лексем: {} | Лексических: {} | Синтаксических: {} | Семантических: {}": "Total tokens: {} | Lexical: {} | Syntax: {} | Semantic: {}",
+                "... показаны первые {} строк AST": "... showing the first {} AST lines",
+                "... показаны первые {} лексем из {}": "... showing the first {} of {} tokens",
                 "Семантика и AST": "Semantics and AST",
                 
                 "Поиск": "Search",
@@ -1421,12 +1440,19 @@ class TextEditor(QMainWindow):
         self.lexical_table.setRowCount(0)
         self.lexical_table.setSortingEnabled(False)
         
-        tokens = self.analyzer.analyze(text)
+        session = self.analysis_sessions.get(text_edit)
+        if session is None:
+            session = self.analysis_sessions[text_edit] = IncrementalParser(
+                IncrementalLexer(self.analyzer), max_errors=SYNTAX_ERROR_LIMIT, engine='table')
+        syntax_tree, syntax_errors = session.update(text)
+        tokens = session.tokens
         
-        self.lexical_table.setRowCount(len(tokens))
+        lexical_error_count = sum(1 for token in tokens if token.is_error)
+        shown_tokens = tokens[:LEXICAL_TABLE_ROW_LIMIT]
+        tokens_truncated = len(tokens) > len(shown_tokens)
+        self.lexical_table.setRowCount(len(shown_tokens) + tokens_truncated)
         
-        lexical_error_count = 0
-        for row, token in enumerate(tokens):
+        for row, token in enumerate(shown_tokens):
             code_item = QTableWidgetItem(str(token.type.code))
             code_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
             
@@ -1452,7 +1478,6 @@ class TextEditor(QMainWindow):
             
             # Подсвечиваем только реальные ошибки (не пробелы)
             if token.is_error:
-                lexical_error_count += 1
                 red_bg = QColor(255, 200, 200)
                 red_fg = QColor(255, 0, 0)
                 for item in [code_item, type_item, value_item, line_item, pos_item]:
@@ -1466,12 +1491,21 @@ class TextEditor(QMainWindow):
             self.lexical_table.setItem(row, 3, line_item)
             self.lexical_table.setItem(row, 4, pos_item)
         
+        if tokens_truncated:
+            # Отметка об обрезке: без номера строки, поэтому при сортировке по строке — первая
+            marker_item = QTableWidgetItem(
+                self.get_text("... показаны первые {} лексем из {}").format(
+                    LEXICAL_TABLE_ROW_LIMIT, len(tokens)))
+            marker_item.setForeground(QColor(255, 0, 0))
+            row = len(shown_tokens)
+            self.lexical_table.setItem(row, 1, marker_item)
+            for column in (0, 2, 3, 4):
+                self.lexical_table.setItem(row, column, QTableWidgetItem(""))
+        
         self.lexical_table.setSortingEnabled(True)
         self.lexical_table.sortItems(3, Qt.SortOrder.AscendingOrder)
         
-        # 2. Синтаксический анализ
-        parser = Parser()
-        syntax_tree, syntax_errors = parser.parse(tokens)
+        # 2. Синтаксический анализ (дерево и ошибки уже получены от сессии вместе с лексемами)
         
         # Очищаем таблицу синтаксических ошибок
         self.syntax_table.setRowCount(0)
@@ -1486,7 +1520,7 @@ class TextEditor(QMainWindow):
             line_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
             pos_item = QTableWidgetItem(str(error.position))
             pos_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            desc_item = QTableWidgetItem(error.description)
+            desc_item = QTableWidgetItem(error.render(self.current_language))
             nav_data = {
                 "line": error.line,
                 "position": error.position,
@@ -1520,7 +1554,7 @@ class TextEditor(QMainWindow):
             line_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
             pos_item = QTableWidgetItem(str(err.column))
             pos_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            desc_item = QTableWidgetItem(err.message)
+            desc_item = QTableWidgetItem(err.render(self.current_language))
             nav_data = {
                 "line": err.line,
                 "position": err.column,
@@ -1534,7 +1568,11 @@ class TextEditor(QMainWindow):
             self.semantic_table.setItem(row, 1, line_item)
             self.semantic_table.setItem(row, 2, pos_item)
             self.semantic_table.setItem(row, 3, desc_item)
-        self.semantic_output.setPlainText(format_ast_single_tree(_fa))
+        ast_text = io.StringIO()
+        _, ast_truncated = write_ast(_fa, ast_text, limit=AST_OUTPUT_LINE_LIMIT)
+        if ast_truncated:
+            ast_text.write(self.get_text("... показаны первые {} строк AST").format(AST_OUTPUT_LINE_LIMIT))
+        self.semantic_output.setPlainText(ast_text.getvalue())
 
         status = self.get_text(
             "Всего лексем: {} | Лексических: {} | Синтаксических: {} | Семантических: {}"
@@ -0,0 +1,190 @@
+"""Семантический проход для таблиц констант, не помещающихся в память.
+
+Объявления читаются потоком (Parser.iter_declarations), диапазоны проверяются
+сразу, а записи (имя, номер, строка, столбец, ошибка диапазона) именованных
+объявлений копятся пачками по run_size, сортируются и сбрасываются во временные
+файлы. Слияние пачек (heapq.merge) выдаёт все объявления одного имени подряд
+в порядке номеров: первое без ошибки диапазона регистрирует имя, все следующие —
+повторы со строкой регистрирующего.
+
+Ссылки после '=' зависят от таблицы имён на момент объявления, поэтому
+все объявления имён, связанных со ссылками (имя объявления со ссылками или
+упомянутое в них), разбираются в памяти по порядку номеров, как
+в analyze_semantics_from_parse. В памяти держатся одна пачка, ошибки,
+участки со ссылками и записи связанных с ними имён.
+"""
+from __future__ import annotations
+
+import heapq
+import pickle
+import tempfile
+from itertools import groupby
+from operator import itemgetter
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from diagnostics import Diagnostic
+from lexical_analyzer import Token
+from parser import Parser, ParserError
+from semantic_analysis import SemanticError, _check_refs, _iter_with_refs, _node_rows, _range_error
+from symbol_table import SymbolTable
+
+DEFAULT_RUN_SIZE = 1_000_000
+# Записей в одном pickle-блоке файла пачки
+_BLOCK_SIZE = 4096
+
+# Запись пачки: имя, номер объявления, строка и столбец имени, ошибка диапазона или None
+_Record = Tuple[str, int, int, int, Optional[SemanticError]]
+
+
+def analyze_semantics_external(
+    tokens: Iterable[Token],
+    trivia_free: bool = False,
+    max_errors: Optional[int] = None,
+    run_size: int = DEFAULT_RUN_SIZE,
+    tmpdir: Optional[str] = None,
+) -> Tuple[int, List[SemanticError], List[ParserError]]:
+    """Семантика потока лексем с ограниченной памятью.
+
+    tokens — итератор лексем (LexicalAnalyzer.iter_tokens, iter_file_tokens);
+    max_errors — бюджет ошибок парсера, см. Parser.iter_declarations; tmpdir —
+    каталог временных файлов пачек. Возвращает (число объявлений, семантические
+    ошибки, синтаксические ошибки); ошибки — в том же порядке и с теми же
+    аргументами, что у analyze_semantics_from_parse над результатом потокового
+    разбора. AST не строится.
+    """
+    if run_size < 1:
+        raise ValueError("run_size должен быть положительным")
+
+    refs: Dict[int, List[Token]] = {}
+    parser = Parser(max_errors=max_errors)
+    declarations = parser.iter_declarations(_iter_with_refs(tokens, refs), trivia_free)
+
+    syntax_errors: List[ParserError] = []
+    # (номер объявления, ошибка); сортируются по номеру в конце
+    found: List[Tuple[int, SemanticError]] = []
+    run: List[_Record] = []
+    files: List[BinaryIO] = []
+    count = 0
+    try:
+        for node, node_errors in declarations:
+            syntax_errors.extend(node_errors)
+            if node is None:
+                continue
+            row = next(_node_rows([node]))
+            decl = row[0]
+            range_error = None
+            if decl.type_node is not None and decl.value is not None:
+                range_error = _range_error(decl.type_node.name, decl.value.value, row)
+            if decl.name:
+                run.append((decl.name, count, row[1], row[2], range_error))
+                if len(run) >= run_size:
+                    files.append(_spill(run, tmpdir))
+                    run = []
+            elif range_error is not None:
+                # Безымянное объявление не регистрирует имя и не бывает повтором
+                found.append((count, range_error))
+            count += 1
+
+        run.sort()
+        _check_external(lambda: _merge_runs(files, run), refs, count, found)
+    finally:
+        for file in files:
+            file.close()
+
+    found.sort(key=itemgetter(0))
+    return count, [error for _, error in found], syntax_errors
+
+
+def _spill(run: List[_Record], tmpdir: Optional[str]) -> BinaryIO:
+    """Сортирует пачку и записывает её во временный файл блоками."""
+    run.sort()
+    file = tempfile.TemporaryFile(dir=tmpdir)
+    for start in range(0, len(run), _BLOCK_SIZE):
+        pickle.dump(run[start:start + _BLOCK_SIZE], file, pickle.HIGHEST_PROTOCOL)
+    file.seek(0)
+    return file
+
+
+def _read_run(file: BinaryIO) -> Iterator[_Record]:
+    while True:
+        try:
+            block = pickle.load(file)
+        except EOFError:
+            return
+        yield from block
+
+
+def _merge_runs(files: List[BinaryIO], run: List[_Record]) -> Iterator[_Record]:
+    """Все записи по (имя, номер): пачки из файлов (с начала) и последняя из памяти."""
+    for file in files:
+        file.seek(0)
+    return heapq.merge(*(_read_run(file) for file in files), run)
+
+
+def _check_external(
+    merge: Callable[[], Iterator[_Record]],
+    refs: Dict[int, List[Token]],
+    count: int,
+    found: List[Tuple[int, SemanticError]],
+) -> None:
+    """Повторы и ошибки диапазона по слитым пачкам, затем — имена, связанные со ссылками.
+
+    Участок со ссылками может дочитаться позже своего объявления, поэтому имена
+    объявлений со ссылками ищутся отдельным слиянием после всего потока.
+    """
+    # Имена, на которые влияют ссылки: их записи разбираются по порядку номеров
+    linked: Set[str] = set()
+    if refs:
+        linked.update(record[0] for record in merge() if record[1] in refs)
+        for chunk in refs.values():
+            linked.update(ref.value for ref in chunk)
+    linked_records: List[_Record] = []
+
+    for name, group in groupby(merge(), key=itemgetter(0)):
+        if name in linked:
+            linked_records.extend(group)
+            continue
+        owner = None
+        for record in group:
+            _, index, line, column, range_error = record
+            if owner is not None:
+                found.append((index, SemanticError(
+                    Diagnostic.DUPLICATE_IDENTIFIER, (name, owner[2]), line, column, fragment=name,
+                )))
+            elif range_error is not None:
+                found.append((index, range_error))
+            else:
+                owner = record
+
+    # Безымянные объявления со ссылками: только проверка ссылок (ошибка диапазона уже есть)
+    named = {record[1] for record in linked_records}
+    linked_records.extend(("", index, 0, 0, None) for index in refs if index < count and index not in named)
+    linked_records.sort(key=itemgetter(1))
+
+    symbols = SymbolTable(len(linked_records))
+    for name, index, line, column, range_error in linked_records:
+        previous = symbols.find(name) if name else None
+        if previous is not None:
+            found.append((index, SemanticError(
+                Diagnostic.DUPLICATE_IDENTIFIER, (name, symbols.lines[previous]), line, column,
+                fragment=name,
+            )))
+            continue
+        faulty = range_error is not None
+        if faulty:
+            found.append((index, range_error))
+        chunk = refs.get(index)
+        if chunk:
+            ref_errors: List[SemanticError] = []
+            if _check_refs(chunk, symbols, ref_errors):
+                faulty = True
+                found.extend((index, error) for error in ref_errors)
+        if not faulty and name:
+            symbols.add(name, line, column)
+
+    # Участков со ссылками больше, чем объявлений: проверяются только ссылки
+    for index in sorted(refs):
+        if index >= count:
+            ref_errors = []
+            _check_refs(refs[index], symbols, ref_errors)
+            found.extend((index, error) for error in ref_errors)
@@ -0,0 +1,314 @@
+"""Инкрементальный анализ: повторный запуск (F5) после небольшой правки
+обрабатывает только изменённые строки документа."""
+from itertools import chain
+
+from lexical_analyzer import LexicalAnalyzer, Token, TokenType
+from parser import _FLOAT_RE, TRIVIA_TOKENS, Parser, SyntaxTreeNode
+
+
+class IncrementalLexer:
+    """Сессия лексического анализа документа с кэшем лексем по строкам.
+
+    Лексер не переносит состояние между строками, поэтому после правки
+    заново разбираются только изменённые строки, а у последующих строк
+    лишь меняется номер. Разобранные строки кэшируются по содержимому,
+    так что повторяющиеся и возвращённые отменой строки не сканируются
+    повторно.
+
+    Номер строки меняется на месте: лексемы, отданные прошлыми вызовами
+    (tokens, reset, update), после правки со сдвигом строк несут уже новые
+    номера. Кому нужен снимок старого состояния, копирует лексемы сам —
+    копирование всех последующих лексем сделало бы правку на порядок медленнее.
+    """
+
+    def __init__(self, analyzer=None, cache_limit=100_000):
+        self.analyzer = analyzer if analyzer is not None else LexicalAnalyzer()
+        self.cache_limit = cache_limit
+        self.lines = []
+        self._line_tokens = []
+        self._templates = {}
+        # Последняя правка: (первая строка с 0, конец старого диапазона, число новых строк)
+        self.last_edit = None
+
+    def reset(self, text):
+        """Полный разбор документа; возвращает список лексем как analyze."""
+        self.last_edit = None
+        self.lines = text.split('\n')
+        self._line_tokens = [
+            self._lex_line(line, line_num)
+            for line_num, line in enumerate(self.lines, 1)
+        ]
+        return self.tokens
+
+    def update(self, text):
+        """Разбирает новый текст документа, сравнивая его с предыдущим построчно."""
+        if not self._line_tokens:
+            return self.reset(text)
+
+        self.last_edit = None
+        old_lines = self.lines
+        new_lines = text.split('\n')
+        limit = min(len(old_lines), len(new_lines))
+        prefix = 0
+        while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+            prefix += 1
+        suffix = 0
+        limit -= prefix
+        while suffix < limit and old_lines[-1 - suffix] == new_lines[-1 - suffix]:
+            suffix += 1
+
+        if prefix != len(old_lines) or prefix != len(new_lines):
+            self._replace(prefix, len(old_lines) - suffix,
+                          new_lines[prefix:len(new_lines) - suffix])
+        return self.tokens
+
+    def edit(self, first_line, last_line, text):
+        """Заменяет строки first_line..last_line (с 1, включительно) текстом text.
+
+        Возвращает номера первой и последней строки вставленного текста.
+        """
+        if not 1 <= first_line <= last_line + 1 <= len(self.lines) + 1:
+            raise ValueError(
+                f"Некорректный диапазон строк {first_line}-{last_line} "
+                f"(в документе {len(self.lines)})")
+        new_lines = text.split('\n')
+        self._replace(first_line - 1, last_line, new_lines)
+        return first_line, first_line + len(new_lines) - 1
+
+    @property
+    def tokens(self):
+        tokens = []
+        for line_tokens in self._line_tokens:
+            tokens.extend(line_tokens)
+        if tokens and not self.analyzer.skip_trivia:
+            # У последней строки нет перевода строки
+            tokens.pop()
+        return tokens
+
+    def _replace(self, start, stop, new_lines):
+        self.last_edit = (start, stop, len(new_lines))
+        delta = len(new_lines) - (stop - start)
+        self.lines[start:stop] = new_lines
+        self._line_tokens[start:stop] = [
+            self._lex_line(line, start + offset + 1)
+            for offset, line in enumerate(new_lines)
+        ]
+        if delta:
+            for index in range(start + len(new_lines), len(self._line_tokens)):
+                line_num = index + 1
+                for token in self._line_tokens[index]:
+                    token.line = line_num
+
+    def _lex_line(self, line, line_num):
+        templates = self._templates.get(line)
+        if templates is not None:
+            return [Token(token_type, value, line_num, start_pos, end_pos, int_value)
+                    for token_type, value, start_pos, end_pos, int_value in templates]
+
+        tokens = self.analyzer.analyze_line(line, line_num)
+        if not self.analyzer.skip_trivia:
+            tokens.append(Token(TokenType.NEWLINE, '\\n', line_num, len(line) + 1, len(line) + 1))
+        if len(self._templates) >= self.cache_limit:
+            self._templates.clear()
+        self._templates[line] = tuple(
+            (token.type, token.value, token.start_pos, token.end_pos, token.int_value)
+            for token in tokens)
+        return tokens
+
+
+class _Segment:
+    """Строки first..stop-1 (с 0), разобранные отдельно от остального документа."""
+
+    def __init__(self, first, stop, tree, errors):
+        self.first = first
+        self.stop = stop
+        self.has_tree = tree is not None
+        self.declarations = tree.children if tree is not None else []
+        self.errors = errors
+
+    def shift(self, delta):
+        """Сдвиг на месте: меняет узлы и ошибки, уже отданные вызывающему."""
+        self.first += delta
+        self.stop += delta
+        for declaration in self.declarations:
+            for child in declaration.children:
+                child.line += delta
+        for error in self.errors:
+            error.line += delta
+
+
+class IncrementalParser:
+    """Сессия синтаксического анализа, которая после правки перестраивает
+    только затронутые объявления.
+
+    Документ делится на участки целых строк по «чистым» границам: строка
+    начинается с 'const', а предыдущие значимые токены — число и ';'
+    (см. Parser.parse_parallel). На такой границе последовательный разбор
+    начинает объявление с чистого состояния, поэтому участки разбираются
+    независимо, а склейка их деревьев и ошибок совпадает с Parser.parse.
+    После правки заново разбираются участки с изменёнными строками и участок
+    перед ними; у последующих участков лишь сдвигаются номера строк.
+    Участки не короче segment_lines строк: так полный разбор не платит за
+    отдельный Parser на каждое объявление, а правка — лишь за десятки строк.
+
+    Дробные числа влияют на разбор всего документа (Parser._float_end_pos),
+    поэтому при их наличии, как и при превышении max_errors, документ
+    разбирается целиком.
+
+    Деревья и ошибки прошлых результатов переиспользуются: после правки
+    со сдвигом строк узлы и ошибки последующих участков (как и лексемы,
+    см. IncrementalLexer) получают новые номера строк на месте, так что
+    прошлый результат годится только до следующей правки.
+    """
+
+    def __init__(self, lexer=None, max_errors=None, segment_lines=64, engine='recursive'):
+        self.lexer = lexer if lexer is not None else IncrementalLexer()
+        self.max_errors = max_errors
+        self.engine = engine
+        self.segment_lines = segment_lines
+        self._segments = []
+        self._float_lines = []
+        self._error_count = 0
+        # Результат разбора целиком: (дерево, ошибки) или None
+        self._whole = None
+        self._analyzed = False
+
+    @property
+    def tokens(self):
+        return self.lexer.tokens
+
+    def reset(self, text):
+        """Полный разбор документа; возвращает (дерево, ошибки) как Parser.parse."""
+        self.lexer.reset(text)
+        self._float_lines = [self._has_float(index) for index in range(len(self.lexer.lines))]
+        self._analyzed = True
+        return self._reparse_all()
+
+    def update(self, text):
+        """Разбирает новый текст документа, сравнивая его с предыдущим построчно."""
+        if not self._analyzed:
+            return self.reset(text)
+        self.lexer.update(text)
+        return self._apply(self.lexer.last_edit)
+
+    def edit(self, first_line, last_line, text):
+        """Заменяет строки first_line..last_line (с 1, включительно) текстом text."""
+        if not self._analyzed:
+            self.reset('\n'.join(self.lexer.lines))
+        self.lexer.edit(first_line, last_line, text)
+        return self._apply(self.lexer.last_edit)
+
+    def _apply(self, change):
+        if change is None:
+            return self._result()
+        start, stop, count = change
+        self._float_lines[start:stop] = [self._has_float(index)
+                                         for index in range(start, start + count)]
+        if self._whole is not None or any(self._float_lines):
+            return self._reparse_all()
+
+        delta = count - (stop - start)
+        segments = self._segments
+        lo = self._segment_index(max(start - 1, 0))
+        hi = self._segment_index(max(stop - 1, start))
+        first = segments[lo].first
+        end = segments[hi].stop + delta
+        # Правка могла испортить границу со следующим участком — тогда он присоединяется
+        while hi + 1 < len(segments) and not self._is_boundary(end):
+            hi += 1
+            end = segments[hi].stop + delta
+
+        new_segments = self._parse_lines(first, end)
+        if new_segments is None:
+            return self._reparse_all()
+        for segment in segments[hi + 1:] if delta else ():
+            segment.shift(delta)
+        self._error_count += (sum(len(segment.errors) for segment in new_segments)
+                              - sum(len(segment.errors) for segment in segments[lo:hi + 1]))
+        segments[lo:hi + 1] = new_segments
+        if self.max_errors is not None and self._error_count > self.max_errors:
+            return self._reparse_all()
+        return self._result()
+
+    def _reparse_all(self):
+        self._whole = None
+        self._segments = []
+        self._error_count = 0
+        if not any(self._float_lines):
+            segments = self._parse_lines(0, len(self.lexer.lines))
+            if segments is not None:
+                self._segments = segments
+                self._error_count = sum(len(segment.errors) for segment in segments)
+                if self.max_errors is None or self._error_count <= self.max_errors:
+                    return self._result()
+                self._segments = []
+        self._whole = Parser(max_errors=self.max_errors, engine=self.engine).parse(self.lexer.tokens)
+        return self._result()
+
+    def _result(self):
+        if self._whole is not None:
+            tree, errors = self._whole
+            return tree, list(errors)
+        errors = list(chain.from_iterable(segment.errors for segment in self._segments))
+        if not any(segment.has_tree for segment in self._segments):
+            # Как Parser.parse: дерева нет, но лексические ошибки остаются
+            return None, errors
+        root = SyntaxTreeNode("program")
+        root.children = list(chain.from_iterable(
+            segment.declarations for segment in self._segments))
+        return root, errors
+
+    def _parse_lines(self, first, stop):
+        """Разбирает строки first..stop-1 по участкам; None — если исчерпан max_errors."""
+        bounds = [first]
+        index = first + self.segment_lines
+        while index < stop:
+            if self._is_boundary(index):
+                bounds.append(index)
+                index += self.segment_lines
+            else:
+                index += 1
+        bounds.append(stop)
+
+        segments = []
+        line_tokens = self.lexer._line_tokens
+        for seg_first, seg_stop in zip(bounds, bounds[1:]):
+            parser = Parser(max_errors=self.max_errors, engine=self.engine)
+            tree, errors = parser.parse(list(chain.from_iterable(line_tokens[seg_first:seg_stop])))
+            if parser.truncated:
+                return None
+            segments.append(_Segment(seg_first, seg_stop, tree, errors))
+        return segments
+
+    def _segment_index(self, line_index):
+        segments = self._segments
+        lo, hi = 0, len(segments) - 1
+        while lo < hi:
+            middle = (lo + hi + 1) // 2
+            if segments[middle].first <= line_index:
+                lo = middle
+            else:
+                hi = middle - 1
+        return lo
+
+    def _is_boundary(self, line_index):
+        """Начинается ли строка line_index (с 0) с 'const' сразу после «число ;»."""
+        line_tokens = self.lexer._line_tokens
+        first = self._significant_types(line_tokens[line_index])
+        if not first or first[0] != TokenType.CONST:
+            return False
+        previous = []
+        for index in range(line_index - 1, -1, -1):
+            previous[:0] = self._significant_types(line_tokens[index])
+            if len(previous) >= 2:
+                return previous[-2] == TokenType.NUMBER and previous[-1] == TokenType.SEMICOLON
+        return False
+
+    @staticmethod
+    def _significant_types(tokens):
+        return [token.type for token in tokens
+                if token.type not in TRIVIA_TOKENS and not token.is_error]
+
+    def _has_float(self, line_index):
+        return any(token.is_error and _FLOAT_RE.fullmatch(token.value)
+                   for token in self.lexer._line_tokens[line_index])
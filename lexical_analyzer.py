@@ -1,5 +1,20 @@
+import bisect
+import codecs
+import gc
+import mmap
+import os
+import re
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from enum import Enum
 
+try:
+    import numpy as np
+except ImportError:  # numpy необязателен: без него движок 'numpy' работает как 'regex'
+    np = None
+
 class TokenType(Enum):
     CONST = (1, "Ключевое слово const")
     IDENTIFIER = (2, "Идентификатор")
@@ -21,13 +36,32 @@ class TokenType(Enum):
     def is_error(self):
         return self.code == 99
 
+# Префиксы целочисленных литералов Rust и допустимые после них цифры
+_RADIX_PREFIXES = {'0x': 16, '0o': 8, '0b': 2}
+_RADIX_DIGITS = {
+    '0x': frozenset('0123456789abcdefABCDEF'),
+    '0o': frozenset('01234567'),
+    '0b': frozenset('01'),
+}
+
+def decode_int_literal(text):
+    """Значение целочисленного литерала Rust (0x, 0o, 0b, разделители '_') или None."""
+    base = _RADIX_PREFIXES.get(text[:2], 10)
+    digits = text[2:] if base != 10 else text
+    try:
+        return int(digits.replace('_', ''), base)
+    except ValueError:
+        return None
+
 class Token:
-    def __init__(self, token_type, value, line, start_pos, end_pos):
+    def __init__(self, token_type, value, line, start_pos, end_pos, int_value=None):
         self.type = token_type
         self.value = value
         self.line = line
         self.start_pos = start_pos
         self.end_pos = end_pos
+        # Для NUMBER — значение литерала, декодированное при лексическом анализе
+        self.int_value = int_value
 
     def __str__(self):
         return f"{self.type.name}: '{self.value}' (строка {self.line}, позиция {self.start_pos}-{self.end_pos})"
@@ -36,8 +70,262 @@ class Token:
     def is_error(self):
         return self.type.is_error
 
+_TOKEN_TYPES = tuple(TokenType)
+_TYPE_CODES = {token_type: code for code, token_type in enumerate(_TOKEN_TYPES)}
+_NEWLINE_CODE = _TYPE_CODES[TokenType.NEWLINE]
+_NUMBER_CODE = _TYPE_CODES[TokenType.NUMBER]
+_ERROR_CODE = _TYPE_CODES[TokenType.ERROR]
+
+class TokenView:
+    """Лёгкое представление лексемы из TokenBuffer с интерфейсом Token."""
+    __slots__ = ('_buffer', '_index')
+
+    def __init__(self, buffer, index):
+        self._buffer = buffer
+        self._index = index
+
+    @property
+    def type(self):
+        return _TOKEN_TYPES[self._buffer.types[self._index]]
+
+    @property
+    def value(self):
+        return self._buffer.value_at(self._index)
+
+    @property
+    def line(self):
+        return self._buffer.lines[self._index]
+
+    @property
+    def start_pos(self):
+        return self._buffer.starts[self._index]
+
+    @property
+    def end_pos(self):
+        return self._buffer.ends[self._index]
+
+    @property
+    def int_value(self):
+        if self._buffer.types[self._index] != _NUMBER_CODE:
+            return None
+        return decode_int_literal(self.value)
+
+    @property
+    def is_error(self):
+        return self.type.is_error
+
+    def __str__(self):
+        return f"{self.type.name}: '{self.value}' (строка {self.line}, позиция {self.start_pos}-{self.end_pos})"
+
+class TokenBuffer:
+    """Колоночное хранилище лексем: коды типов, строки и позиции в массивах array,
+    значения — смещения в исходном тексте. Индексация возвращает TokenView."""
+
+    def __init__(self, source):
+        self.source = source
+        self.types = array('B')
+        self.lines = array('i')
+        self.starts = array('i')
+        self.ends = array('i')
+        self.offsets = array('q')
+
+    def append(self, token_type, line, start_pos, end_pos, offset):
+        self.types.append(_TYPE_CODES[token_type])
+        self.lines.append(line)
+        self.starts.append(start_pos)
+        self.ends.append(end_pos)
+        self.offsets.append(offset)
+
+    def value_at(self, index):
+        if self.types[index] == _NEWLINE_CODE:
+            return '\\n'
+        offset = self.offsets[index]
+        return self.source[offset:offset + self.ends[index] - self.starts[index] + 1]
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [TokenView(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("индекс лексемы вне диапазона")
+        return TokenView(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield TokenView(self, index)
+
+    def columns(self):
+        return self.types, self.lines, self.starts, self.ends, self.offsets
+
+    def extend(self, columns):
+        """Дописывает колонки другого буфера (того же исходного текста)."""
+        for own, other in zip(self.columns(), columns):
+            own.extend(other)
+
+    def truncate(self, length):
+        """Отбрасывает лексемы с номера length до конца."""
+        for column in self.columns():
+            del column[length:]
+
+    def to_tokens(self):
+        return [Token(view.type, view.value, view.line, view.start_pos, view.end_pos, view.int_value)
+                for view in self]
+
+    @property
+    def nbytes(self):
+        """Память, занятая колонками (без исходного текста)."""
+        return sum(sys.getsizeof(column) for column in
+                   (self.types, self.lines, self.starts, self.ends, self.offsets))
+
+# Единое регулярное выражение сканера: каждая альтернатива — одна ветка
+# автомата из _analyze_line. Лексемы идут подряд без пропусков для любой
+# ASCII-строки, поэтому позиции считаются по длинам найденных лексем.
+# Не-ASCII строки обрабатываются посимвольным циклом (isalpha/isdigit Unicode).
+_MASTER_PATTERN = re.compile(
+    r" +"
+    r"|\t"
+    r"|[:=;]"
+    r"|[A-Za-z_][A-Za-z0-9_]*"
+    r"|0x_*[0-9a-fA-F][0-9a-fA-F_]*|0o_*[0-7][0-7_]*|0b_*[01][01_]*"
+    r"|[0-9][0-9_]*(?:\.(?:[0-9][0-9_]*)?)?"
+    r"|[^A-Za-z0-9_:=; ]+"
+)
+
+# Целочисленный литерал Rust (или дробное число — ошибка) с текущей позиции
+_NUMBER_PATTERN = re.compile(
+    r"0x_*[0-9a-fA-F][0-9a-fA-F_]*|0o_*[0-7][0-7_]*|0b_*[01][01_]*"
+    r"|[0-9][0-9_]*(?:\.(?:[0-9][0-9_]*)?)?"
+)
+
+# Тип лексемы по первому символу; IDENTIFIER уточняется по словарю слов,
+# NUMBER с точкой — дробное число (ошибка).
+_FIRST_CHAR_TYPES = {
+    ' ': TokenType.SPACE,
+    '\t': TokenType.TAB,
+    ':': TokenType.COLON,
+    '=': TokenType.ASSIGN,
+    ';': TokenType.SEMICOLON,
+}
+_FIRST_CHAR_TYPES.update(dict.fromkeys('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_', TokenType.IDENTIFIER))
+_FIRST_CHAR_TYPES.update(dict.fromkeys('0123456789', TokenType.NUMBER))
+
+# Те же таблицы для разбора байтов отображённого в память файла
+_MASTER_PATTERN_BYTES = re.compile(_MASTER_PATTERN.pattern.encode('ascii'))
+_FIRST_BYTE_TYPES = {ord(char): token_type for char, token_type in _FIRST_CHAR_TYPES.items()}
+_NON_ASCII_BYTES = re.compile(rb'[\x80-\xff]')
+# Переводы строк как при чтении файла в текстовом режиме
+_LINE_BREAK_BYTES = re.compile(rb'\r\n|\r|\n')
+_ASCII_BYTES = bytes(range(128))
+
+
+def _ascii_compatible(encoding):
+    """Каждый байт меньше 0x80 в encoding — тот же символ ASCII (UTF-8, cp1251, latin-1...).
+
+    Только для таких кодировок файл можно резать по байтам перевода строки
+    и сканировать ASCII-строки прямо по байтам; UTF-16, UTF-7 и ISO-2022 — нельзя.
+    """
+    name = codecs.lookup(encoding).name
+    if name.startswith('iso2022') or name == 'hz':
+        # 7-битные кодировки с переключением состояния: не-ASCII символы — тоже байты < 0x80
+        return False
+    try:
+        return _ASCII_BYTES.decode(encoding) == _ASCII_BYTES.decode('ascii')
+    except UnicodeDecodeError:
+        return False
+
+class LineIndex:
+    """Индекс начал строк в байтовом буфере (bytes или mmap): смещения в array('q')."""
+
+    def __init__(self, data):
+        self.data = data
+        self.starts = array('q', [0])
+        for match in _LINE_BREAK_BYTES.finditer(data):
+            self.starts.append(match.end())
+
+    def __len__(self):
+        return len(self.starts)
+
+    def line_bounds(self, line_num):
+        """Байтовые границы строки line_num (с 1) без символов перевода строки."""
+        start = self.starts[line_num - 1]
+        if line_num == len(self.starts):
+            return start, len(self.data)
+        end = self.starts[line_num]
+        return start, end - (2 if self.data[end - 2:end] == b'\r\n' else 1)
+
+    def position(self, offset):
+        """Номер строки (с 1) и байтовый столбец (с 1) для смещения offset."""
+        line_num = bisect.bisect_right(self.starts, offset)
+        return line_num, offset - self.starts[line_num - 1] + 1
+
+# Классы символов для движка 'numpy'. Символы ':', '=', ';' и перевод строки
+# всегда образуют отдельную лексему; серия пробелов — одну лексему SPACE.
+# Остальные классы составляют «слова» — серии, внутри которых лексемы
+# не зависят от соседних символов (см. _analyze_ascii_numpy).
+_CLASS_SPACE, _CLASS_TAB, _CLASS_NEWLINE, _CLASS_COLON, _CLASS_ASSIGN, _CLASS_SEMICOLON, \
+    _CLASS_ALPHA, _CLASS_DIGIT, _CLASS_DOT, _CLASS_OTHER = range(10)
+_SINGLE_CHAR_CLASSES = (_CLASS_NEWLINE, _CLASS_COLON, _CLASS_ASSIGN, _CLASS_SEMICOLON)
+_WORD_CLASSES = (_CLASS_TAB, _CLASS_ALPHA, _CLASS_DIGIT, _CLASS_DOT, _CLASS_OTHER)
+# Тип лексемы по классу первого символа (IDENTIFIER уточняется по словарю слов)
+_CLASS_TOKEN_TYPES = {
+    _CLASS_SPACE: TokenType.SPACE,
+    _CLASS_TAB: TokenType.TAB,
+    _CLASS_NEWLINE: TokenType.NEWLINE,
+    _CLASS_COLON: TokenType.COLON,
+    _CLASS_ASSIGN: TokenType.ASSIGN,
+    _CLASS_SEMICOLON: TokenType.SEMICOLON,
+    _CLASS_ALPHA: TokenType.IDENTIFIER,
+    _CLASS_DIGIT: TokenType.NUMBER,
+    _CLASS_DOT: TokenType.ERROR,
+    _CLASS_OTHER: TokenType.ERROR,
+}
+
+if np is not None:
+    _CHAR_CLASSES = np.full(128, _CLASS_OTHER, dtype=np.uint8)
+    _CHAR_CLASSES[ord(' ')] = _CLASS_SPACE
+    _CHAR_CLASSES[ord('\t')] = _CLASS_TAB
+    _CHAR_CLASSES[ord('\n')] = _CLASS_NEWLINE
+    _CHAR_CLASSES[ord(':')] = _CLASS_COLON
+    _CHAR_CLASSES[ord('=')] = _CLASS_ASSIGN
+    _CHAR_CLASSES[ord(';')] = _CLASS_SEMICOLON
+    _CHAR_CLASSES[ord('.')] = _CLASS_DOT
+    for _char in 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_':
+        _CHAR_CLASSES[ord(_char)] = _CLASS_ALPHA
+    _CHAR_CLASSES[ord('0'):ord('9') + 1] = _CLASS_DIGIT
+    _SINGLE_CHAR_MASK = np.zeros(_CLASS_OTHER + 1, dtype=bool)
+    _SINGLE_CHAR_MASK[list(_SINGLE_CHAR_CLASSES)] = True
+    # Класс серии: все классы слов сливаются в один (_CLASS_OTHER)
+    _RUN_CLASSES = np.arange(_CLASS_OTHER + 1, dtype=np.uint8)
+    _RUN_CLASSES[list(_WORD_CLASSES)] = _CLASS_OTHER
+    _CLASS_TYPE_CODES = np.array([_TYPE_CODES[_CLASS_TOKEN_TYPES[cls]] for cls in range(_CLASS_OTHER + 1)],
+                                 dtype=np.uint8)
+    # Символы слова, которых нет в идентификаторе
+    _NOT_IDENT_MASK = np.zeros(_CLASS_OTHER + 1, dtype=bool)
+    _NOT_IDENT_MASK[[_CLASS_TAB, _CLASS_DOT, _CLASS_OTHER]] = True
+    _TRIVIA_CLASS_MASK = np.zeros(_CLASS_OTHER + 1, dtype=bool)
+    _TRIVIA_CLASS_MASK[[_CLASS_SPACE, _CLASS_TAB, _CLASS_NEWLINE]] = True
+
 class LexicalAnalyzer:
-    def __init__(self):
+    ENGINES = ('loop', 'regex', 'numpy')
+
+    def __init__(self, engine='loop', skip_trivia=False, max_errors=None, max_errors_per_line=None):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Неизвестный движок сканера '{engine}': ожидается один из {self.ENGINES}")
+        for name, limit in (('max_errors', max_errors), ('max_errors_per_line', max_errors_per_line)):
+            if limit is not None and limit < 0:
+                raise ValueError(f"Лимит {name} не может быть отрицательным: {limit}")
+        self.engine = engine
+        # Не создавать лексемы SPACE/TAB/NEWLINE (позиции остальных не меняются)
+        self.skip_trivia = skip_trivia
+        # Бюджет ошибок analyze: всего и в одной строке (None — без ограничения)
+        self.max_errors = max_errors
+        self.max_errors_per_line = max_errors_per_line
+        # True, если последний analyze отбросил часть текста из-за бюджета ошибок
+        self.truncated = False
         self.allowed_chars = set('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_:=; ')
 
         self.keywords = {
@@ -63,15 +351,75 @@ class LexicalAnalyzer:
             ';': TokenType.SEMICOLON,
         }
 
+        self._words = {**self.types, **self.keywords}
+
+        if engine == 'loop':
+            self._scan_line = self._analyze_line
+        else:
+            # Построчные API (analyze_line, iter_tokens) движка 'numpy' используют регулярное выражение
+            self._scan_line = self._analyze_line_regex
+
     def analyze(self, text):
+        self.truncated = False
+        if self.max_errors is not None or self.max_errors_per_line is not None:
+            return self._analyze_bounded(text)
+
+        if self.engine == 'numpy' and np is not None and text.isascii():
+            return self._analyze_ascii_numpy(text)
+
         tokens = []
         lines = text.split('\n')
 
         for line_num, line in enumerate(lines, 1):
-            line_tokens = self._analyze_line(line, line_num)
+            line_tokens = self._scan_line(line, line_num)
             tokens.extend(line_tokens)
 
-            if line_num < len(lines):
+            if line_num < len(lines) and not self.skip_trivia:
+                tokens.append(Token(
+                    TokenType.NEWLINE,
+                    '\\n',
+                    line_num,
+                    len(line) + 1,
+                    len(line) + 1
+                ))
+
+        return tokens
+
+    def _analyze_bounded(self, text):
+        """analyze с бюджетом ошибок.
+
+        Лексема-ошибка сверх max_errors_per_line отбрасывает остаток своей строки,
+        сверх max_errors — весь остаток текста; в обоих случаях ставится truncated.
+        Строки выделяются по мере разбора, так что на мусоре с ранним исчерпанием
+        бюджета работа не зависит от размера текста.
+        """
+        tokens = []
+        max_errors = self.max_errors
+        per_line = self.max_errors_per_line
+        errors = 0
+        line_num = 0
+        start = 0
+
+        while True:
+            line_num += 1
+            end = text.find('\n', start)
+            line = text[start:] if end < 0 else text[start:end]
+            line_errors = 0
+            for token in self._scan_line(line, line_num):
+                if token.is_error:
+                    if max_errors is not None and errors >= max_errors:
+                        self.truncated = True
+                        return tokens
+                    if per_line is not None and line_errors >= per_line:
+                        self.truncated = True
+                        break
+                    errors += 1
+                    line_errors += 1
+                tokens.append(token)
+
+            if end < 0:
+                return tokens
+            if not self.skip_trivia:
                 tokens.append(Token(
                     TokenType.NEWLINE,
                     '\\n',
@@ -79,9 +427,268 @@ class LexicalAnalyzer:
                     len(line) + 1,
                     len(line) + 1
                 ))
+            start = end + 1
+
+    def analyze_line(self, line, line_num):
+        """Лексемы одной строки без завершающего NEWLINE."""
+        return self._scan_line(line, line_num)
+
+    def analyze_to_buffer(self, text):
+        """Как analyze, но складывает лексемы в TokenBuffer, не создавая объектов Token.
+
+        Бюджет ошибок (max_errors, max_errors_per_line) действует так же, как в analyze.
+        """
+        self.truncated = False
+        buffer = TokenBuffer(text)
+        bounded = self.max_errors is not None or self.max_errors_per_line is not None
+        self._fill_buffer(buffer, text, 1, 0, bounded)
+        return buffer
+
+    def analyze_parallel(self, text, workers=None, min_chunk_chars=1 << 20):
+        """Как analyze_to_buffer, но лексирует блоки строк в нескольких процессах.
+
+        Лексер не переносит состояние между строками, поэтому текст режется
+        по переводам строк, а номера строк и смещения каждого блока задаются
+        заранее. Процессы возвращают колонки array, которые склеиваются по порядку.
+        Небольшие тексты разбираются в текущем процессе. Бюджет ошибок, как
+        и в Parser.parse_parallel, требует последовательного разбора: с ним
+        analyze_to_buffer останавливается на первой ошибке сверх бюджета.
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if (workers <= 1 or len(text) < 2 * min_chunk_chars
+                or self.max_errors is not None or self.max_errors_per_line is not None):
+            return self.analyze_to_buffer(text)
+        self.truncated = False
+
+        chunk_chars = max(min_chunk_chars, len(text) // (workers * 4) + 1)
+        chunks, first_lines, offsets = _split_at_newlines(text, chunk_chars)
+        count = len(chunks)
+
+        buffer = TokenBuffer(text)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for columns in pool.map(_lex_chunk_to_columns,
+                                    [self.engine] * count, [self.skip_trivia] * count,
+                                    chunks, first_lines, offsets):
+                buffer.extend(columns)
+        return buffer
+
+    def _fill_buffer(self, buffer, text, first_line, offset, bounded=False):
+        lines = text.split('\n')
+        last_line = first_line + len(lines) - 1
+        errors = 0
+
+        for line_num, line in enumerate(lines, first_line):
+            mark = len(buffer)
+            self._buffer_line(buffer, line, line_num, offset)
+            if bounded:
+                errors, exhausted = self._bound_buffer_line(buffer, mark, errors)
+                if exhausted:
+                    return
+
+            if line_num < last_line and not self.skip_trivia:
+                buffer.append(
+                    TokenType.NEWLINE,
+                    line_num,
+                    len(line) + 1,
+                    len(line) + 1,
+                    offset + len(line)
+                )
+            offset += len(line) + 1
+
+    def _bound_buffer_line(self, buffer, mark, errors):
+        """Бюджет ошибок для лексем строки buffer[mark:], как в _analyze_bounded.
+
+        errors — ошибок в предыдущих строках. Возвращает (ошибок с этой строкой,
+        исчерпан ли max_errors — тогда остаток текста не разбирается).
+        """
+        max_errors = self.max_errors
+        per_line = self.max_errors_per_line
+        types = buffer.types
+        line_errors = 0
+        for index in range(mark, len(types)):
+            if types[index] == _ERROR_CODE:
+                if max_errors is not None and errors >= max_errors:
+                    self.truncated = True
+                    buffer.truncate(index)
+                    return errors, True
+                if per_line is not None and line_errors >= per_line:
+                    self.truncated = True
+                    buffer.truncate(index)
+                    return errors, False
+                errors += 1
+                line_errors += 1
+        return errors, False
+
+    def _buffer_line(self, buffer, line, line_num, offset):
+        if not line.isascii():
+            for token in self._analyze_line(line, line_num):
+                buffer.append(token.type, line_num, token.start_pos, token.end_pos,
+                              offset + token.start_pos - 1)
+            return
+
+        types_append = buffer.types.append
+        lines_append = buffer.lines.append
+        starts_append = buffer.starts.append
+        ends_append = buffer.ends.append
+        offsets_append = buffer.offsets.append
+        words = self._words
+        first_char_types = _FIRST_CHAR_TYPES
+        type_codes = _TYPE_CODES
+        identifier = TokenType.IDENTIFIER
+        number = TokenType.NUMBER
+        error = TokenType.ERROR
+        space = TokenType.SPACE
+        tab = TokenType.TAB
+        skip_trivia = self.skip_trivia
+        end = 0
+
+        for value in _MASTER_PATTERN.findall(line):
+            start = end
+            end += len(value)
+            token_type = first_char_types.get(value[0], error)
+            if token_type is identifier:
+                token_type = words.get(value, identifier)
+            elif token_type is number and '.' in value:
+                token_type = error
+            elif skip_trivia and (token_type is space or token_type is tab):
+                continue
+            types_append(type_codes[token_type])
+            lines_append(line_num)
+            starts_append(start + 1)
+            ends_append(end)
+            offsets_append(offset + start)
+
+    def analyze_file(self, path, encoding='utf-8'):
+        return list(self.iter_file_tokens(path, encoding))
+
+    def iter_file_tokens(self, path, encoding='utf-8'):
+        """Лексемы файла, отображённого в память через mmap, без чтения его в str.
+
+        Один раз строится LineIndex; ASCII-строки сканируются прямо по байтам
+        отображения, остальные декодируются построчно (ошибки декодирования
+        заменяются на U+FFFD). Переводы строк \\r\\n и \\r понимаются как при
+        чтении файла в текстовом режиме.
+
+        Кодировки, не совместимые с ASCII (UTF-16 и т. п.), так по байтам
+        не разобрать: такой файл читается как текст через iter_tokens.
+        """
+        if not _ascii_compatible(encoding):
+            with open(path, encoding=encoding, errors='replace') as stream:
+                yield from self.iter_tokens(stream)
+            return
+        with open(path, 'rb') as file:
+            try:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Пустой файл отобразить нельзя
+                data = b''
+            try:
+                index = LineIndex(data)
+                last_line = len(index)
+                for line_num in range(1, last_line + 1):
+                    start, end = index.line_bounds(line_num)
+                    if _NON_ASCII_BYTES.search(data, start, end):
+                        line = data[start:end].decode(encoding, errors='replace')
+                        yield from self._scan_line(line, line_num)
+                        length = len(line)
+                    else:
+                        yield from self._analyze_bytes_line(data, start, end, line_num)
+                        length = end - start
+
+                    if line_num < last_line and not self.skip_trivia:
+                        yield Token(
+                            TokenType.NEWLINE,
+                            '\\n',
+                            line_num,
+                            length + 1,
+                            length + 1
+                        )
+            finally:
+                if isinstance(data, mmap.mmap):
+                    data.close()
+
+    def _analyze_bytes_line(self, data, start, end, line_num):
+        """_analyze_line_regex для ASCII-строки data[start:end] без копирования строки."""
+        tokens = []
+        append = tokens.append
+        words = self._words
+        first_byte_types = _FIRST_BYTE_TYPES
+        identifier = TokenType.IDENTIFIER
+        number = TokenType.NUMBER
+        error = TokenType.ERROR
+        space = TokenType.SPACE
+        tab = TokenType.TAB
+        skip_trivia = self.skip_trivia
+        column = 0
+
+        for raw in _MASTER_PATTERN_BYTES.findall(data, start, end):
+            first = column + 1
+            column += len(raw)
+            token_type = first_byte_types.get(raw[0], error)
+            if skip_trivia and (token_type is space or token_type is tab):
+                continue
+            value = raw.decode('ascii')
+            if token_type is identifier:
+                token_type = words.get(value, identifier)
+            elif token_type is number:
+                if b'.' in raw:
+                    token_type = error
+                else:
+                    append(Token(number, value, line_num, first, column, decode_int_literal(value)))
+                    continue
+            append(Token(token_type, value, line_num, first, column))
 
         return tokens
 
+    def iter_tokens(self, stream, chunk_size=1 << 16, encoding='utf-8'):
+        """Лениво выдаёт те же лексемы, что analyze, читая файловый объект по частям.
+
+        Поток может быть текстовым или двоичным (тогда он декодируется
+        инкрементально в encoding). В памяти держится только текущий блок
+        и незавершённая строка.
+        """
+        decoder = None
+        partial = []
+        line_num = 1
+
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            if isinstance(chunk, (bytes, bytearray)):
+                if decoder is None:
+                    decoder = codecs.getincrementaldecoder(encoding)()
+                chunk = decoder.decode(chunk)
+
+            newline_at = chunk.find('\n')
+            if newline_at < 0:
+                partial.append(chunk)
+                continue
+
+            partial.append(chunk[:newline_at])
+            lines = chunk[newline_at + 1:].split('\n')
+            lines[0:0] = [''.join(partial)]
+            partial = [lines.pop()]
+
+            for line in lines:
+                yield from self._scan_line(line, line_num)
+                if self.skip_trivia:
+                    line_num += 1
+                    continue
+                yield Token(
+                    TokenType.NEWLINE,
+                    '\\n',
+                    line_num,
+                    len(line) + 1,
+                    len(line) + 1
+                )
+                line_num += 1
+
+        if decoder is not None:
+            partial.append(decoder.decode(b'', final=True))
+        yield from self._scan_line(''.join(partial), line_num)
+
     def _analyze_line(self, line, line_num):
         tokens = []
         i = 0
@@ -92,6 +699,8 @@ class LexicalAnalyzer:
                 start = i
                 while i < length and line[i] == ' ':
                     i += 1
+                if self.skip_trivia:
+                    continue
                 tokens.append(Token(
                     TokenType.SPACE,
                     line[start:i],
@@ -102,13 +711,14 @@ class LexicalAnalyzer:
                 continue
 
             if line[i] == '\t':
-                tokens.append(Token(
-                    TokenType.TAB,
-                    line[i],
-                    line_num,
-                    i + 1,
-                    i + 1
-                ))
+                if not self.skip_trivia:
+                    tokens.append(Token(
+                        TokenType.TAB,
+                        line[i],
+                        line_num,
+                        i + 1,
+                        i + 1
+                    ))
                 i += 1
                 continue
 
@@ -158,13 +768,31 @@ class LexicalAnalyzer:
 
             if line[i].isdigit():
                 start = i
-                while i < length and line[i].isdigit():
+                radix_digits = _RADIX_DIGITS.get(line[i:i + 2])
+                if radix_digits:
+                    j = i + 2
+                    while j < length and (line[j] in radix_digits or line[j] == '_'):
+                        j += 1
+                    if line[i + 2:j].strip('_'):
+                        i = j
+                        tokens.append(Token(
+                            TokenType.NUMBER,
+                            line[start:i],
+                            line_num,
+                            start + 1,
+                            i,
+                            decode_int_literal(line[start:i])
+                        ))
+                        continue
+
+                while i < length and (line[i].isdigit() or line[i] == '_'):
                     i += 1
 
                 if i < length and line[i] == '.':
                     i += 1
-                    while i < length and line[i].isdigit():
-                        i += 1
+                    if i < length and line[i].isdigit():
+                        while i < length and (line[i].isdigit() or line[i] == '_'):
+                            i += 1
                     tokens.append(Token(
                         TokenType.ERROR,
                         line[start:i],
@@ -178,7 +806,8 @@ class LexicalAnalyzer:
                         line[start:i],
                         line_num,
                         start + 1,
-                        i
+                        i,
+                        decode_int_literal(line[start:i])
                     ))
                 continue
 
@@ -195,9 +824,167 @@ class LexicalAnalyzer:
 
         return tokens
 
+    def _analyze_line_regex(self, line, line_num):
+        """То же, что _analyze_line, но одним проходом скомпилированного регулярного выражения."""
+        if not line.isascii():
+            return self._analyze_line(line, line_num)
+
+        tokens = []
+        append = tokens.append
+        words = self._words
+        first_char_types = _FIRST_CHAR_TYPES
+        identifier = TokenType.IDENTIFIER
+        number = TokenType.NUMBER
+        error = TokenType.ERROR
+        space = TokenType.SPACE
+        tab = TokenType.TAB
+        skip_trivia = self.skip_trivia
+        end = 0
+
+        for value in _MASTER_PATTERN.findall(line):
+            start = end + 1
+            end += len(value)
+            token_type = first_char_types.get(value[0], error)
+            if token_type is identifier:
+                token_type = words.get(value, identifier)
+            elif token_type is number:
+                if '.' in value:
+                    token_type = error
+                else:
+                    append(Token(number, value, line_num, start, end, decode_int_literal(value)))
+                    continue
+            elif skip_trivia and (token_type is space or token_type is tab):
+                continue
+            append(Token(token_type, value, line_num, start, end))
+
+        return tokens
+
+    def _analyze_ascii_numpy(self, text):
+        """Разбор ASCII-текста сериями: классы символов — одной табличной выборкой
+        numpy, границы серий — векторным сравнением соседей.
+
+        Серия — пробелы, одиночный символ ':', '=', ';', '\\n' или «слово»
+        (подряд идущие буквы, цифры, табуляции и прочие символы). Пробелы,
+        одиночный символ и простое слово — идентификатор без точек и прочих
+        символов, десятичное число из одних цифр, одна табуляция — дают ровно
+        одну лексему. Такие лексемы собираются целиком: значения, типы, строки
+        и столбцы считаются по массивам, а Token создаются одним map без цикла
+        по сериям. Прочие слова (0x1F, 1_000, 3.5, @#) разбирает
+        _analyze_line_regex, и их лексемы вставляются на свои места.
+        """
+        length = len(text)
+        if not length:
+            return []
+
+        classes = _CHAR_CLASSES[np.frombuffer(text.encode('ascii'), dtype=np.uint8)]
+        run_classes = _RUN_CLASSES[classes]
+        run_starts = np.empty(length, dtype=bool)
+        run_starts[0] = True
+        np.not_equal(run_classes[1:], run_classes[:-1], out=run_starts[1:])
+        run_starts |= _SINGLE_CHAR_MASK[classes]
+        starts = np.flatnonzero(run_starts)
+        ends = np.append(starts[1:], length)
+        first = classes[starts]
+
+        # Простые слова: нет символов, с которыми слово может распасться на лексемы
+        not_ident = np.concatenate(([0], np.cumsum(_NOT_IDENT_MASK[classes])))
+        not_digit = np.concatenate(([0], np.cumsum(classes != _CLASS_DIGIT)))
+        simple = ((run_classes[starts] != _CLASS_OTHER)
+                  | ((first == _CLASS_ALPHA) & (not_ident[ends] == not_ident[starts]))
+                  | (not_digit[ends] == not_digit[starts])
+                  | ((first == _CLASS_TAB) & (ends - starts == 1)))
+        keep = simple
+        if self.skip_trivia:
+            keep = simple & ~_TRIVIA_CLASS_MASK[first]
+
+        # Строка и её начало для каждой серии
+        newlines = np.flatnonzero(classes == _CLASS_NEWLINE)
+        line_index = np.searchsorted(newlines, starts)
+        line_starts = np.concatenate(([0], newlines + 1))[line_index]
+
+        with _gc_paused():
+            tokens = self._numpy_tokens(text, starts, ends, first, keep, line_index, line_starts)
+
+        complex_runs = np.flatnonzero(~simple)
+        if not len(complex_runs):
+            return tokens
+        # Сложные слова вставляются после всех сохранённых серий перед ними
+        inserted = np.cumsum(keep)[complex_runs] - keep[complex_runs]
+        result = []
+        done = 0
+        for run, position in zip(complex_runs.tolist(), inserted.tolist()):
+            result.extend(tokens[done:position])
+            done = position
+            start, line_start = int(starts[run]), int(line_starts[run])
+            shift = start - line_start
+            for token in self._analyze_line_regex(text[start:int(ends[run])], int(line_index[run]) + 1):
+                token.start_pos += shift
+                token.end_pos += shift
+                result.append(token)
+        result.extend(tokens[done:])
+        return result
+
+    def _numpy_tokens(self, text, starts, ends, first, keep, line_index, line_starts):
+        """Лексемы серий keep одним map: значения срезами, типы по классу первого символа."""
+        kept_starts = starts[keep].tolist()
+        kept_ends = ends[keep].tolist()
+        values = list(map(text.__getitem__, map(slice, kept_starts, kept_ends)))
+        type_codes = _CLASS_TYPE_CODES[first[keep]]
+        types = list(map(self._words.get, values,
+                         map(_TOKEN_TYPES.__getitem__, type_codes.tolist())))
+        int_values = [None] * len(values)
+        for index in np.flatnonzero(type_codes == _NUMBER_CODE).tolist():
+            int_values[index] = int(values[index])
+        for index in np.flatnonzero(type_codes == _NEWLINE_CODE).tolist():
+            values[index] = '\\n'
+        kept_line_starts = line_starts[keep]
+        return list(map(Token, types, values, (line_index[keep] + 1).tolist(),
+                        (starts[keep] - kept_line_starts + 1).tolist(),
+                        (ends[keep] - kept_line_starts).tolist(), int_values))
+
     def validate_const_declaration(self, tokens):
         for token in tokens:
             if token.is_error:
                 return False, f"Строка {token.line}: недопустимый символ '{token.value}' на позиции {token.start_pos}"
         return True, "OK"
-    
\ No newline at end of file
+    
+
+
+@contextmanager
+def _gc_paused():
+    """Без циклического сборщика мусора: лексемы не образуют циклов, а на миллионах
+    новых объектов он запускается сотни раз впустую, почти удваивая время разбора."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _split_at_newlines(text, chunk_chars):
+    """Режет текст на блоки не короче chunk_chars, каждый заканчивается переводом строки
+    (кроме последнего). Возвращает блоки, номера их первых строк и смещения."""
+    chunks = []
+    first_lines = []
+    offsets = []
+    start = 0
+    line_num = 1
+    while start < len(text):
+        end = text.find('\n', start + chunk_chars)
+        end = len(text) if end < 0 else end + 1
+        chunk = text[start:end]
+        chunks.append(chunk)
+        first_lines.append(line_num)
+        offsets.append(start)
+        line_num += chunk.count('\n')
+        start = end
+    return chunks, first_lines, offsets
+
+
+def _lex_chunk_to_columns(engine, skip_trivia, text, first_line, offset):
+    """Точка входа рабочего процесса analyze_parallel."""
+    buffer = TokenBuffer(text)
+    LexicalAnalyzer(engine=engine, skip_trivia=skip_trivia)._fill_buffer(buffer, text, first_line, offset)
+    return buffer.columns()
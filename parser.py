@@ -1,25 +1,115 @@
-from lexical_analyzer import TokenType
+import os
+import re
+import time
+from array import array
+from bisect import bisect_right
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+
+from diagnostics import Diagnostic
+from lexical_analyzer import Token, TokenType
 
 SYNC_TOKENS = {TokenType.SEMICOLON, TokenType.CONST}
+# Кортеж, а не множество: проверка «in» идёт по идентичности, без хеширования Enum
+TRIVIA_TOKENS = (TokenType.SPACE, TokenType.TAB, TokenType.NEWLINE)
+
+# Лексема-ошибка вида «123.» / «1_0.5» — дробное число
+_FLOAT_RE = re.compile(r'\d[\d_]*\.(?:\d[\d_]*)?')
+
+# Коды типов для передачи участков потока в рабочие процессы колонками
+_TOKEN_TYPES = tuple(TokenType)
+_TYPE_CODES = {token_type: code for code, token_type in enumerate(_TOKEN_TYPES)}
+# Виды дочерних узлов const_declaration в том же колоночном формате
+_NODE_KINDS = ("keyword", "identifier", "type", "value")
+_NODE_KIND_CODES = {kind: code for code, kind in enumerate(_NODE_KINDS)}
+# Строка SyntaxArena: слот на каждый вид дочернего узла, 0xFF — слот пуст
+_ROW_WIDTH = len(_NODE_KINDS)
+_EMPTY_SLOT = 0xFF
+_FULL_ROW = bytes(range(_ROW_WIDTH))
+_EMPTY_ROW = bytes([_EMPTY_SLOT]) * _ROW_WIDTH
+
+# Автомат корректного объявления «const ИМЯ : ТИП = ЧИСЛО ;» для движка 'table':
+# _DECLARATION_TABLE[состояние][TokenType.code] — следующее состояние или -1
+# (индекс по code, а не по члену Enum: хеширование Enum идёт через Python-код)
+_DECLARATION_PATH = (
+    TokenType.CONST, TokenType.IDENTIFIER, TokenType.COLON, TokenType.TYPE,
+    TokenType.ASSIGN, TokenType.NUMBER, TokenType.SEMICOLON,
+)
+_DECLARATION_ACCEPT = len(_DECLARATION_PATH)
+_MAX_TYPE_CODE = max(token_type.code for token_type in TokenType)
+_DECLARATION_TABLE = [
+    [state + 1 if code == expected.code else -1 for code in range(_MAX_TYPE_CODE + 1)]
+    for state, expected in enumerate(_DECLARATION_PATH)
+]
 
 class ParserError:
-    def __init__(self, fragment, line, position, description, *, cursor_only=False):
+    """Ошибка разбора: код диагностики и аргументы, текст — по запросу (см. diagnostics).
+
+    Вместо diagnostic можно передать готовый текст описания, как раньше:
+    он становится аргументом Diagnostic.SYNTAX_MESSAGE.
+    """
+
+    def __init__(self, fragment, line, position, diagnostic, args=(), *, cursor_only=False):
+        if isinstance(diagnostic, str):
+            diagnostic, args = Diagnostic.SYNTAX_MESSAGE, (diagnostic,)
         self.fragment = fragment
         self.line = line
         self.position = position
-        self.description = description
+        self.diagnostic = diagnostic
+        self.args = args
         self.cursor_only = cursor_only
 
+    @property
+    def code(self):
+        return self.diagnostic.code
+
+    @property
+    def description(self):
+        return self.diagnostic.render(self.args)
+
+    def render(self, language=None):
+        return self.diagnostic.render(self.args, language)
+
     def __str__(self):
         return (f"[строка {self.line}, позиция {self.position}] "
                 f"{self.description}: '{self.fragment}'")
 
+# Правила и вспомогательные методы, которые Parser(profile=True) оборачивает счётчиками
+_PROFILED_RULES = (
+    '_parse_one_declaration', '_parse_declaration_by_table', '_parse_body',
+    '_skip_stray_semicolons_before_identifier', '_skip_junk', '_synchronize',
+    '_report_unexpected_sequence_and_sync',
+    '_lookahead', '_ident_ahead', '_declaration_ahead', '_ident_then_type_before_sync',
+    '_should_parse_declaration_body', '_spurious_token_before_ident_colon',
+    '_looks_like_const_keyword_typo', '_only_semicolons_remaining',
+)
+# Процедуры восстановления: продвижение позиции в них — пропущенные лексемы
+_RECOVERY_RULES = frozenset((
+    '_skip_stray_semicolons_before_identifier', '_skip_junk', '_synchronize',
+    '_report_unexpected_sequence_and_sync',
+))
+
+class RuleProfile:
+    """Счётчики одного правила: вызовы, суммарное время (с вложенными вызовами), пропущенные лексемы."""
+
+    __slots__ = ('calls', 'seconds', 'skipped')
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.skipped = 0
+
+class _ErrorBudgetExceeded(Exception):
+    """Внутренний сигнал: исчерпан бюджет ошибок Parser(max_errors=...)."""
+
 class SyntaxTreeNode:
-    def __init__(self, node_type, value=None, line=None, position=None):
+    def __init__(self, node_type, value=None, line=None, position=None, literal=None):
         self.node_type = node_type
         self.value = value
         self.line = line
         self.position = position
+        # Для узла value — значение литерала, уже декодированное лексером
+        self.literal = literal
         self.children = []
 
     def add_child(self, child):
@@ -27,76 +117,546 @@ class SyntaxTreeNode:
             self.children.append(child)
 
     def __str__(self, level=0):
-        indent = "  " * level
-        result = f"{indent}{self.node_type}"
-        if self.value:
-            result += f": {self.value}"
-        if self.line:
-            result += f" (строка {self.line})"
-        result += "\n"
-        for child in self.children:
-            result += child.__str__(level + 1)
-        return result
+        return "".join(self.iter_lines(level))
+
+    def iter_lines(self, level=0):
+        """Строки дерева (с '\\n') в порядке обхода — без рекурсии и склейки строк."""
+        yield _node_line(level, self.node_type, self.value, self.line)
+        # Стек итераторов по детям: память — по глубине дерева, а не по ширине
+        stack = [(iter(self.children), level + 1)]
+        while stack:
+            children, depth = stack[-1]
+            node = next(children, None)
+            if node is None:
+                stack.pop()
+                continue
+            yield _node_line(depth, node.node_type, node.value, node.line)
+            if node.children:
+                stack.append((iter(node.children), depth + 1))
+
+
+def _node_line(level, node_type, value, line):
+    result = f"{'  ' * level}{node_type}"
+    if value:
+        result += f": {value}"
+    if line:
+        result += f" (строка {line})"
+    return result + "\n"
+
+
+def write_lines(lines, sink, limit=None, offset=0):
+    """Записать строки lines в текстовый приёмник sink (файл, io.StringIO, ...).
+
+    offset строк пропускаются, записывается не больше limit (None — все).
+    Возвращает (число записанных строк, остались ли строки после limit) —
+    для этого после limit заглядывает на одну строку вперёд.
+    """
+    lines = iter(lines)
+    stop = None if limit is None else offset + limit
+    written = 0
+    for text in islice(lines, offset, stop):
+        sink.write(text)
+        written += 1
+    more = limit is not None and written == limit and next(lines, None) is not None
+    return written, more
+
+
+def write_syntax_tree(tree, sink, limit=None, offset=0):
+    """Потоковый вывод str(tree) для SyntaxTreeNode или SyntaxArena, по строке за раз."""
+    return write_lines(tree.iter_lines(), sink, limit, offset)
+
+class SyntaxArena:
+    """Компактное дерево разбора программы: объявления — строки фиксированной
+    ширины в параллельных массивах вместо SyntaxTreeNode на каждый узел.
+
+    Слот declaration * 4 + код вида (keyword, identifier, type, value) хранит
+    вид узла в kinds (_EMPTY_SLOT — узла нет), ссылку на строку лексемы
+    в values, строку и позицию в lines/positions. Декодированный литерал —
+    по одному на объявление в literals. Узлы SyntaxTreeNode создаются только
+    по запросу (child, declaration, to_tree).
+    """
+
+    node_type = "program"
 
-class Parser:
     def __init__(self):
+        self.kinds = bytearray()
+        self.values = []
+        self.lines = array('i')
+        self.positions = array('i')
+        self.literals = []
+
+    @property
+    def count(self):
+        """Число объявлений (не __len__: пустая программа не должна быть ложной, как и узел)."""
+        return len(self.literals)
+
+    def append_tokens(self, const, ident, type_tok, number):
+        """Полное объявление прямо из лексем «const ИМЯ : ТИП = ЧИСЛО»."""
+        self.kinds += _FULL_ROW
+        self.values += (const.value, ident.value, type_tok.value, number.value)
+        self.lines.extend((const.line, ident.line, type_tok.line, number.line))
+        self.positions.extend((const.start_pos, ident.start_pos, type_tok.start_pos, number.start_pos))
+        self.literals.append(number.int_value)
+
+    def append_node(self, node):
+        """Объявление из узла const_declaration (в том числе неполного)."""
+        self._append_row(
+            (_NODE_KIND_CODES[child.node_type], child.value, child.line, child.position, child.literal)
+            for child in node.children)
+
+    def extend_columns(self, columns):
+        """Объявления в колоночном формате рабочих процессов parse_parallel."""
+        counts, kinds, values, lines, positions, literals = columns
+        index = 0
+        for count in counts:
+            self._append_row(
+                (kinds[i], values[i], lines[i], positions[i], literals[i])
+                for i in range(index, index + count))
+            index += count
+
+    def _append_row(self, children):
+        base = len(self.kinds)
+        self.kinds += _EMPTY_ROW
+        self.values += (None,) * _ROW_WIDTH
+        self.lines.extend((0,) * _ROW_WIDTH)
+        self.positions.extend((0,) * _ROW_WIDTH)
+        row_literal = None
+        for code, value, line, position, literal in children:
+            slot = base + code
+            self.kinds[slot] = code
+            self.values[slot] = value
+            self.lines[slot] = line
+            self.positions[slot] = position
+            if literal is not None:
+                row_literal = literal
+        self.literals.append(row_literal)
+
+    def child(self, declaration, kind):
+        """Дочерний узел kind объявления с номером declaration или None."""
+        code = _NODE_KIND_CODES[kind]
+        slot = declaration * _ROW_WIDTH + code
+        if self.kinds[slot] == _EMPTY_SLOT:
+            return None
+        literal = self.literals[declaration] if kind == "value" else None
+        return SyntaxTreeNode(kind, self.values[slot], self.lines[slot], self.positions[slot],
+                              literal=literal)
+
+    def declaration(self, declaration):
+        node = SyntaxTreeNode("const_declaration")
+        for kind in _NODE_KINDS:
+            node.add_child(self.child(declaration, kind))
+        return node
+
+    def to_tree(self):
+        """Обычное дерево SyntaxTreeNode с тем же содержимым."""
+        root = SyntaxTreeNode("program")
+        root.children = [self.declaration(i) for i in range(self.count)]
+        return root
+
+    def iter_lines(self):
+        """Строки str(self) прямо из массивов, без узлов SyntaxTreeNode."""
+        yield _node_line(0, "program", None, None)
+        kinds, values, lines = self.kinds, self.values, self.lines
+        for declaration in range(self.count):
+            yield _node_line(1, "const_declaration", None, None)
+            base = declaration * _ROW_WIDTH
+            for code, kind in enumerate(_NODE_KINDS):
+                slot = base + code
+                if kinds[slot] != _EMPTY_SLOT:
+                    yield _node_line(2, kind, values[slot], lines[slot])
+
+    def __str__(self):
+        return "".join(self.iter_lines())
+
+class Parser:
+    ENGINES = ('recursive', 'table')
+
+    def __init__(self, max_errors=None, engine='recursive', arena=False, profile=False):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Неизвестный движок парсера '{engine}': ожидается один из {self.ENGINES}")
+        if max_errors is not None and max_errors < 0:
+            raise ValueError(f"Лимит max_errors не может быть отрицательным: {max_errors}")
+        # 'table' разбирает корректные объявления по таблице переходов, остальное —
+        # как 'recursive' (рекурсивный спуск с восстановлением)
+        self.engine = engine
+        # arena=True — дерево программы строится как SyntaxArena
+        self.arena = arena
+        self._root = None
         self.significant_tokens = []
         self.position = 0
         self.current_token = None
         self.errors = []
         self.syntax_tree = None
+        # Ссылки на идентификаторы после '=' по участкам между ';' — только после
+        # parse(..., collect_refs=True), иначе None (см. _prepass)
+        self.chunk_refs = None
+        # Таблицы следующих вхождений типов токенов (см. _next_index)
+        self._next_of = None
+        self._next_sync = None
+        # Бюджет ошибок: после max_errors ошибок разбор прерывается (None — без ограничения)
+        self.max_errors = max_errors
+        self.truncated = False
+        # profile=True — счётчики по правилам (profile_report); обёртки ставятся
+        # на экземпляр, поэтому без профилирования разбор не платит ничего
+        self.profile = None
+        if profile:
+            self._install_profile({name: RuleProfile() for name in _PROFILED_RULES})
+
+    def _install_profile(self, profile):
+        """Обернуть правила счётчиками profile (словарь правило -> RuleProfile)."""
+        self.profile = profile
+        for name in _PROFILED_RULES:
+            setattr(self, name, self._profiled(name, getattr(self, name)))
+
+    def _profiled(self, name, method):
+        stats = self.profile[name]
+        counter = time.perf_counter
+        recovery = name in _RECOVERY_RULES
+
+        def wrapper(*args, **kwargs):
+            position = self.position
+            start = counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                stats.seconds += counter() - start
+                stats.calls += 1
+                if recovery:
+                    stats.skipped += self.position - position
+
+        return wrapper
+
+    def reset_profile(self):
+        if self.profile is not None:
+            for stats in self.profile.values():
+                stats.calls, stats.seconds, stats.skipped = 0, 0.0, 0
+
+    def profile_report(self):
+        """Таблица счётчиков profile=True по убыванию времени (время включает вложенные правила).
+
+        parse_parallel учитывает только разбор в текущем процессе.
+        """
+        if self.profile is None:
+            raise ValueError("Профилирование не включено: создайте Parser(profile=True)")
+        lines = [f"{'правило':<42}{'вызовов':>10}{'время, с':>12}{'пропущено':>11}"]
+        for name, stats in sorted(self.profile.items(), key=lambda item: -item[1].seconds):
+            if stats.calls:
+                lines.append(f"{name:<42}{stats.calls:>10}{stats.seconds:>12.4f}{stats.skipped:>11}")
+        skipped = sum(stats.skipped for stats in self.profile.values())
+        lines.append(f"Пропущено лексем процедурами восстановления: {skipped}")
+        return "\n".join(lines)
+
+    def parse(self, tokens, trivia_free=False, collect_refs=False):
+        """trivia_free=True — поток уже без SPACE/TAB/NEWLINE (LexicalAnalyzer(skip_trivia=True)).
+        Пробельные лексемы отбрасываются и без флага, поэтому на результат он не влияет.
+
+        collect_refs=True — заодно собрать chunk_refs для семантического прохода
+        (analyze_semantics_from_parse(..., chunk_refs=parser.chunk_refs)).
+
+        При max_errors разбор прерывается на ошибке сверх бюджета; из найденных
+        до этого остаются первые max_errors по порядку в тексте, за ними — отметка
+        о прерывании анализа (truncated=True). Это не обязательно начало полного
+        списка ошибок: восстановление иногда находит ошибку левее уже найденных,
+        и такая ошибка после прерывания в список не попадёт.
+
+        Если значимых токенов нет, дерева нет (None), а ошибки — лексические.
+        """
+        lex_errors, truncated = self._start(tokens, collect_refs)
+        if not self.significant_tokens:
+            return self._finish(None, lex_errors, truncated)
+
+        root, budget_spent = self._parse_significant()
+        return self._finish(root, lex_errors, truncated or budget_spent)
+
+    def parse_parallel(self, tokens, trivia_free=False, workers=None, min_shard_tokens=1 << 16,
+                       collect_refs=False):
+        """Как parse, но разбирает участки потока значимых токенов в нескольких процессах.
+
+        Поток режется только перед 'const', которому предшествуют число и ';':
+        последовательный разбор на таком месте всегда заканчивает объявление
+        и начинает следующее с чистого состояния, а предикаты заглядывания
+        не смотрят дальше ближайшего ';'. Поэтому дерево и ошибки совпадают
+        с parse. Бюджет ошибок (max_errors) требует последовательного разбора.
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers <= 1 or self.max_errors is not None:
+            return self.parse(tokens, trivia_free, collect_refs)
+
+        lex_errors, truncated = self._start(tokens, collect_refs)
+        if not self.significant_tokens:
+            return self._finish(None, lex_errors, truncated)
+
+        shard_tokens = max(min_shard_tokens, len(self.significant_tokens) // (workers * 4) + 1)
+        bounds = self._shard_bounds(shard_tokens)
+        if len(bounds) <= 2:
+            root, budget_spent = self._parse_significant()
+            return self._finish(root, lex_errors, truncated or budget_spent)
+
+        shards = [_shard_columns(self.significant_tokens[start:end])
+                  for start, end in zip(bounds, bounds[1:])]
+        count = len(shards)
+
+        root = SyntaxArena() if self.arena else SyntaxTreeNode("program")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for declarations, errors in pool.map(_parse_shard, shards,
+                                                 [self._float_before_pos] * count,
+                                                 [self._float_end_pos] * count,
+                                                 [self.engine] * count):
+                if self.arena:
+                    root.extend_columns(declarations)
+                else:
+                    root.children.extend(_declarations_from_columns(declarations))
+                self.errors.extend(_errors_from_columns(errors))
+
+        self.position = len(self.significant_tokens)
+        self._update()
+        return self._finish(root, lex_errors, truncated)
+
+    def iter_declarations(self, tokens, trivia_free=False, max_window=1 << 16):
+        """Потоковый разбор: по итератору лексем выдаёт (объявление, его ошибки).
+
+        Лексемы копятся в окне до чистой границы — 'const' сразу после «число ;»
+        (см. parse_parallel), и окно разбирается целиком, как parse; в памяти
+        держится одно окно. Ошибки окна делятся между его объявлениями по позиции;
+        ошибки без объявления выдаются как (None, ошибки). Окно без чистой
+        границы длиннее max_window лексем режется после последнего ';' (или
+        целиком) — только для таких операторов результат может отличаться
+        от parse. Дробные числа parse учитывает по всему тексту (_float_before_pos,
+        _float_end_pos), а поток — в пределах окна, поэтому при них ошибки
+        «Ожидается числовой литерал» тоже могут расходиться с parse.
+
+        Окна разбираются с настройками этого парсера: движком, счётчиками
+        profile (profile_report покажет весь поток) и arena — тогда окно
+        строится как SyntaxArena, а узел объявления создаётся из неё только
+        при выдаче.
 
-    def parse(self, tokens):
+        max_errors действует на весь поток: окно разбирается с остатком бюджета,
+        после него (без недоразобранного объявления) выдаётся (None, [отметка
+        о прерывании анализа]), и поток заканчивается (truncated=True).
+        """
+        self.truncated = False
+        self.chunk_refs = None
+        max_errors = self.max_errors
+        window_parser = Parser(engine=self.engine, arena=self.arena)
+        if self.profile is not None:
+            window_parser._install_profile(self.profile)
+        emitted = 0
+        last_error = None
+        for window in _stream_windows(tokens, max_window):
+            if max_errors is not None:
+                window_parser.max_errors = max_errors - emitted
+            root, errors = window_parser.parse(window, trivia_free)
+            if window_parser.truncated:
+                # Отметка окна считает остаток бюджета — выдаётся своя, по всему потоку
+                errors.pop()
+            for node, node_errors in _split_errors(root, errors):
+                emitted += len(node_errors)
+                if node_errors:
+                    last_error = node_errors[-1]
+                yield node, node_errors
+            if window_parser.truncated:
+                self.truncated = True
+                yield None, [_truncation_error(last_error, max_errors)]
+                return
+
+    def _start(self, tokens, collect_refs=False):
+        """Сброс состояния и пред-проход. Возвращает (лексические ошибки, обрезаны ли они)."""
         self.errors = []
         self.position = 0
+        self.truncated = False
+        self._next_of = None
+        max_errors = self.max_errors
 
-        import re as _re
         self._float_before_pos = set()
         self._float_end_pos = set()
+        error_tokens, self.significant_tokens = self._prepass(tokens, collect_refs)
+
+        truncated = max_errors is not None and len(error_tokens) > max_errors
+        if truncated:
+            # Позиции дробных чисел уже собраны по всем ошибкам — они нужны разбору
+            del error_tokens[max_errors:]
         lex_errors = []
-        for idx, token in enumerate(tokens):
-            if token.is_error:
-                if _re.match(r'^\d+\.\d*$', token.value):
-                    msg = f"Дробное число '{token.value}' недопустимо: используйте целое число"
-                    found_next = False
-                    for nxt in tokens[idx+1:]:
-                        if nxt.type.name not in ('SPACE', 'TAB', 'NEWLINE') and not nxt.is_error:
-                            self._float_before_pos.add(nxt.start_pos)
-                            found_next = True
-                            break
-                    if not found_next:
-                        self._float_end_pos.add(token.end_pos)
-                else:
-                    msg = f"Лексическая ошибка: недопустимый символ '{token.value}'"
-                lex_errors.append(ParserError(
-                    token.value, token.line, token.start_pos, msg
-                ))
+        for token, is_float in error_tokens:
+            diagnostic = Diagnostic.FLOAT_LITERAL if is_float else Diagnostic.INVALID_CHARACTER
+            lex_errors.append(ParserError(
+                token.value, token.line, token.start_pos, diagnostic, (token.value,)
+            ))
+        return lex_errors, truncated
 
-        self.significant_tokens = [
-            t for t in tokens
-            if t.type not in (TokenType.SPACE, TokenType.TAB, TokenType.NEWLINE)
-            and not t.is_error
-        ]
+    def _parse_significant(self):
+        """Основной цикл по significant_tokens. Возвращает (program, исчерпан ли бюджет)."""
+        self._update()
+        root = self._root = SyntaxArena() if self.arena else SyntaxTreeNode("program")
+        if self.engine == 'table':
+            parse_declaration = self._parse_declaration_by_table
+        else:
+            parse_declaration = self._parse_one_declaration
 
-        if not self.significant_tokens:
-            return None, self.errors
+        try:
+            while self.current_token:
+                pos_before = self.position
+                node = parse_declaration()
+                if node:
+                    self._emit_declaration(node)
+                if self.position == pos_before:
+                    self._advance()
+        except _ErrorBudgetExceeded:
+            # Недоразобранное объявление в дерево не попадает
+            return root, True
+        return root, False
 
-        self._update()
-        root = SyntaxTreeNode("program")
+    def _parse_declaration_by_table(self):
+        """Объявление по таблице переходов; если перехода нет — обычный разбор
+        с восстановлением от начала того же объявления.
 
-        while self.current_token:
-            pos_before = self.position
-            node = self._parse_one_declaration()
-            if node:
-                root.add_child(node)
-            if self.position == pos_before:
-                self._advance()
+        Автомат принимает только цепочку, которую рекурсивный спуск разбирает
+        без ошибок; ';' после неё означал бы ошибку «повторяющийся оператор»,
+        поэтому такой случай тоже уходит в обычный разбор.
+        """
+        tokens = self.significant_tokens
+        start = self.position
+        end = start + _DECLARATION_ACCEPT
+        if end <= len(tokens):
+            table = _DECLARATION_TABLE
+            state = 0
+            for i in range(start, end):
+                state = table[state][tokens[i].type.code]
+                if state < 0:
+                    return self._parse_one_declaration()
+            if end == len(tokens) or tokens[end].type is not TokenType.SEMICOLON:
+                const, ident, _, type_tok, _, number, _ = tokens[start:end]
+                self.position = end
+                self._update()
+                if self.arena:
+                    # Строка арены пишется прямо из лексем, без промежуточных узлов
+                    self._root.append_tokens(const, ident, type_tok, number)
+                    return None
+                node = SyntaxTreeNode("const_declaration")
+                node.children = [
+                    SyntaxTreeNode("keyword", const.value, const.line, const.start_pos),
+                    SyntaxTreeNode("identifier", ident.value, ident.line, ident.start_pos),
+                    SyntaxTreeNode("type", type_tok.value, type_tok.line, type_tok.start_pos),
+                    SyntaxTreeNode("value", number.value, number.line, number.start_pos,
+                                   literal=number.int_value),
+                ]
+                return node
+        return self._parse_one_declaration()
+
+    def _emit_declaration(self, node):
+        if self.arena:
+            self._root.append_node(node)
+        else:
+            self._root.add_child(node)
+
+    def _shard_bounds(self, shard_tokens):
+        """Границы участков для parse_parallel: 'const' сразу после «число ;»."""
+        types = [t.type for t in self.significant_tokens]
+        n = len(types)
+        bounds = [0]
+        k = max(shard_tokens, 2)
+        while k < n:
+            if (types[k] == TokenType.CONST
+                    and types[k - 1] == TokenType.SEMICOLON
+                    and types[k - 2] == TokenType.NUMBER):
+                bounds.append(k)
+                k += shard_tokens
+            else:
+                k += 1
+        bounds.append(n)
+        return bounds
 
+    def _finish(self, root, lex_errors, truncated):
+        max_errors = self.max_errors
         self.syntax_tree = root
         self.errors.extend(lex_errors)
         self.errors.sort(key=lambda e: (e.line, e.position))
+        if max_errors is not None and len(self.errors) > max_errors:
+            truncated = True
+        if truncated:
+            # Лексические и синтаксические ошибки ограничены порознь — общий бюджет тот же
+            del self.errors[max_errors:]
+            self.mark_truncated()
         return root, self.errors
 
+    def _prepass(self, tokens, collect_refs=False):
+        """Один обратный проход по лексемам: значимые токены и лексемы-ошибки.
+
+        Идя с конца, проход знает ближайший следующий значимый токен, поэтому
+        для дробного числа сразу отмечает позицию токена за ним (_float_before_pos)
+        или свой конец, если дальше значимых токенов нет (_float_end_pos).
+        С collect_refs заодно собирает chunk_refs: для непустых участков между ';'
+        (по номеру участка) — идентификаторы после первого '=' участка, только
+        где они есть; без него chunk_refs = None.
+        Возвращает ([(лексема, дробное ли), ...], significant_tokens) в прямом порядке.
+        """
+        significant = []
+        error_tokens = []
+        next_start = None
+        float_match = _FLOAT_RE.fullmatch
+        error = TokenType.ERROR
+        semicolon = TokenType.SEMICOLON
+        identifier = TokenType.IDENTIFIER
+        assign = TokenType.ASSIGN
+        # Участки считаются с конца; идентификаторы участка — в обратном порядке,
+        # refs_count из них стоят после самого раннего (последнего встреченного) '='
+        chunk = 0
+        chunk_open = False
+        idents = []
+        refs_count = 0
+        reversed_refs = []
+        for token in reversed(tokens):
+            token_type = token.type
+            if token_type is error:
+                is_float = float_match(token.value) is not None
+                if is_float:
+                    if next_start is not None:
+                        self._float_before_pos.add(next_start)
+                    else:
+                        self._float_end_pos.add(token.end_pos)
+                error_tokens.append((token, is_float))
+            elif token_type not in TRIVIA_TOKENS:
+                next_start = token.start_pos
+                significant.append(token)
+                if not collect_refs:
+                    continue
+                if token_type is semicolon:
+                    if chunk_open:
+                        if refs_count:
+                            reversed_refs.append((chunk, idents[:refs_count]))
+                        chunk += 1
+                        chunk_open = False
+                        if idents:
+                            idents = []
+                            refs_count = 0
+                else:
+                    chunk_open = True
+                    if token_type is identifier:
+                        idents.append(token)
+                    elif token_type is assign:
+                        refs_count = len(idents)
+        self.chunk_refs = None
+        if collect_refs:
+            if chunk_open:
+                if refs_count:
+                    reversed_refs.append((chunk, idents[:refs_count]))
+                chunk += 1
+            self.chunk_refs = {chunk - 1 - index: refs[::-1] for index, refs in reversed_refs}
+        significant.reverse()
+        error_tokens.reverse()
+        return error_tokens, significant
+
+    def mark_truncated(self):
+        """Добавить в конец ошибок отметку о прерывании анализа по бюджету ошибок.
+
+        Вызывается и снаружи, если бюджет исчерпал лексер (LexicalAnalyzer.truncated).
+        """
+        if self.truncated:
+            return
+        self.truncated = True
+        self.errors.append(_truncation_error(self.errors[-1] if self.errors else None,
+                                             self.max_errors))
+
     def _looks_like_const_keyword_typo(self, token):
         if not token or token.type != TokenType.IDENTIFIER:
             return False
@@ -106,15 +666,8 @@ class Parser:
     def _ident_then_type_before_sync(self):
         if not self.current_token or self.current_token.type != TokenType.IDENTIFIER:
             return False
-        for i in range(self.position + 1, len(self.significant_tokens)):
-            t = self.significant_tokens[i].type
-            if t == TokenType.CONST:
-                return False
-            if t == TokenType.SEMICOLON:
-                return False
-            if t == TokenType.TYPE:
-                return True
-        return False
+        pos = self.position + 1
+        return self._next_index(TokenType.TYPE, pos) < self._next_sync[pos]
 
     def _should_parse_declaration_body(self):
         t = self.current_token
@@ -168,16 +721,16 @@ class Parser:
         return True
 
     def _only_semicolons_remaining(self):
-        for i in range(self.position, len(self.significant_tokens)):
-            if self.significant_tokens[i].type != TokenType.SEMICOLON:
-                return False
-        return True
+        n = len(self.significant_tokens)
+        pos = self.position
+        return all(table[pos] == n for token_type, table in self._lookahead_tables().items()
+                   if token_type != TokenType.SEMICOLON)
 
     def _report_const_declaration_fully_missing(self, anchor):
         """Значимых токенов нет кроме ';' — одна ошибка о пропуске const."""
         self._add_error(
             anchor,
-            "Пропущено ключевое слово 'const'",
+            Diagnostic.MISSING_CONST,
             cursor_only=True,
             const_insert=True,
         )
@@ -202,9 +755,7 @@ class Parser:
 
         if self._looks_like_const_keyword_typo(self.current_token):
             bad = self.current_token
-            self._add_error(
-                bad, f"Ожидается ключевое слово 'const', найдено '{bad.value}'"
-            )
+            self._add_error(bad, Diagnostic.CONST_EXPECTED, (bad.value,))
             self._advance()
             return self._parse_body(const_token=None)
 
@@ -218,7 +769,7 @@ class Parser:
                         and self._peek_is(2, TokenType.ASSIGN))):
                 self._add_error(
                     bad,
-                    "Пропущено ключевое слово 'const'",
+                    Diagnostic.MISSING_CONST,
                     cursor_only=True,
                     const_insert=True,
                 )
@@ -227,8 +778,7 @@ class Parser:
                   and self._peek_is(2, TokenType.COLON)):
                 self._add_error(
                     bad,
-                    f"В начале объявления константы ожидается ключевое слово 'const', "
-                    f"а не тип данных '{bad.value}'",
+                    Diagnostic.CONST_EXPECTED_NOT_TYPE, (bad.value,),
                     cursor_only=True,
                     const_insert=True,
                 )
@@ -239,8 +789,7 @@ class Parser:
                   and self._peek_is(3, TokenType.ASSIGN)):
                 self._add_error(
                     bad,
-                    f"В начале объявления константы ожидается ключевое слово 'const', "
-                    f"а не тип данных '{bad.value}'",
+                    Diagnostic.CONST_EXPECTED_NOT_TYPE, (bad.value,),
                     cursor_only=True,
                     const_insert=True,
                 )
@@ -250,34 +799,33 @@ class Parser:
                   and self._peek_is(2, TokenType.COLON)):
                 self._add_error(
                     bad,
-                    "Пропущено ключевое слово 'const'",
+                    Diagnostic.MISSING_CONST,
                     cursor_only=True,
                     const_insert=True,
                 )
                 self._add_error(
                     bad,
-                    "Числовой литерал нельзя использовать вместо идентификатора",
+                    Diagnostic.NUMBER_AS_IDENTIFIER,
                 )
                 self._advance()
             elif self._spurious_token_before_ident_colon():
                 self._add_error(
                     bad,
-                    f"В начале объявления константы ожидается ключевое слово 'const', "
-                    f"а не '{bad.value}'",
+                    Diagnostic.CONST_EXPECTED_NOT_TOKEN, (bad.value,),
                     cursor_only=True,
                     const_insert=True,
                 )
                 self._advance()
             elif bad.type == TokenType.IDENTIFIER and not looks_like_const_typo:
                 self._add_error(
-                    bad, "Пропущено ключевое слово 'const'",
+                    bad, Diagnostic.MISSING_CONST,
                     cursor_only=True, const_insert=True)
                 if not (self._peek_is(1, TokenType.COLON)
                         or self._peek_is(1, TokenType.TYPE)
                         or self._peek_is(1, TokenType.IDENTIFIER)):
                     self._advance()
             else:
-                self._add_error(bad, f"Ожидается ключевое слово 'const', найдено '{bad.value}'")
+                self._add_error(bad, Diagnostic.CONST_EXPECTED, (bad.value,))
                 self._advance()
             return self._parse_body(const_token=None)
 
@@ -296,13 +844,13 @@ class Parser:
         if n > 1:
             self._add_error(
                 start,
-                f"Лишние точки с запятой ({n} шт.) перед именем константы",
+                Diagnostic.EXTRA_SEMICOLONS_BEFORE_NAME, (n,),
                 fragment=frag,
             )
         else:
             self._add_error(
                 start,
-                "Лишняя точка с запятой перед именем константы",
+                Diagnostic.EXTRA_SEMICOLON_BEFORE_NAME,
             )
 
     def _parse_body(self, const_token):
@@ -325,8 +873,8 @@ class Parser:
                             and self._peek_is(1, TokenType.TYPE)
                             and self._peek_is(2, TokenType.ASSIGN))
                    and self._ident_ahead()):
-                self._add_error(self.current_token,
-                                f"Неожиданный токен '{self.current_token.value}', ожидается идентификатор")
+                self._add_error(self.current_token, Diagnostic.UNEXPECTED_TOKEN_IDENTIFIER_EXPECTED,
+                                (self.current_token.value,))
                 self._advance()
 
             ident = self._match(TokenType.IDENTIFIER)
@@ -336,7 +884,7 @@ class Parser:
                 bad_t = self.current_token
                 self._add_error(
                     bad_t,
-                    f"Запрещено использовать тип данных '{bad_t.value}' вместо идентификатора",
+                    Diagnostic.TYPE_AS_IDENTIFIER, (bad_t.value,),
                 )
                 self._advance()
                 reported_type_as_name = True
@@ -347,7 +895,7 @@ class Parser:
                 bad_t = self.current_token
                 self._add_error(
                     bad_t,
-                    f"Запрещено использовать тип данных '{bad_t.value}' вместо идентификатора",
+                    Diagnostic.TYPE_AS_IDENTIFIER, (bad_t.value,),
                 )
                 self._advance()
                 reported_type_as_name = True
@@ -359,7 +907,7 @@ class Parser:
             bad = self.current_token
             self._add_error(
                 bad,
-                "Ожидается имя константы (идентификатор), нельзя повторять 'const'",
+                Diagnostic.REPEATED_CONST,
             )
             self._advance()
             skipped_duplicate_const = True
@@ -380,16 +928,16 @@ class Parser:
             if not skip_ident_err:
                 cur = self.current_token or self._last()
                 if self.current_token:
-                    self._add_error(cur, "Ожидается идентификатор", cursor_only=True)
+                    self._add_error(cur, Diagnostic.IDENTIFIER_EXPECTED, cursor_only=True)
                 elif cur:
-                    self._add_error(cur, "Ожидается идентификатор", cursor_only=True, insert_after=True)
+                    self._add_error(cur, Diagnostic.IDENTIFIER_EXPECTED, cursor_only=True, insert_after=True)
                 else:
-                    self._add_error(None, "Ожидается идентификатор")
+                    self._add_error(None, Diagnostic.IDENTIFIER_EXPECTED)
 
         self._skip_junk(
             want=TokenType.COLON,
             hard_stop={TokenType.TYPE, TokenType.ASSIGN, TokenType.SEMICOLON},
-            msg="Неожиданный токен '{val}' перед ':'"
+            diagnostic=Diagnostic.UNEXPECTED_TOKEN_BEFORE_COLON
         )
 
         colon_found = self._match_repeated(TokenType.COLON, ":")
@@ -400,32 +948,30 @@ class Parser:
                 extra_ident = self.current_token
                 self._add_error(
                     extra_ident,
-                    "Лишний идентификатор: имя константы может быть только одним; "
-                    "ожидается ':' перед типом данных",
+                    Diagnostic.EXTRA_IDENTIFIER,
                 )
                 self._advance()
             elif (self._cur_is(TokenType.TYPE)
                   and self._peek_is(1, TokenType.ASSIGN)):
                 self._add_error(
                     self.current_token,
-                    "Пропущен символ ':' между именем константы и типом данных",
+                    Diagnostic.MISSING_COLON_BEFORE_TYPE,
                     cursor_only=True,
                 )
             else:
                 self._add_error(
-                    self.current_token or self._last(), "Пропущен ':'", cursor_only=True)
+                    self.current_token or self._last(), Diagnostic.MISSING_COLON, cursor_only=True)
 
         while (self._cur_is(TokenType.ASSIGN)
                and (self._peek_is(1, TokenType.TYPE)
                     or self._peek_is(1, TokenType.IDENTIFIER))):
-            self._add_error(self.current_token,
-                            "Неожиданный токен '=' перед типом данных")
+            self._add_error(self.current_token, Diagnostic.ASSIGN_BEFORE_TYPE)
             self._advance()
 
         self._skip_junk(
             want=TokenType.TYPE,
             hard_stop={TokenType.IDENTIFIER, TokenType.ASSIGN, TokenType.SEMICOLON},
-            msg="Неожиданный токен '{val}' перед типом данных"
+            diagnostic=Diagnostic.UNEXPECTED_TOKEN_BEFORE_TYPE
         )
 
         type_tok = self._match(TokenType.TYPE)
@@ -435,7 +981,7 @@ class Parser:
         else:
             self._add_error(
                 self.current_token or self._last(),
-                "Ожидается тип данных (i8, i16, i32, i64, u8, u16, u32, u64...)",
+                Diagnostic.TYPE_EXPECTED,
                 cursor_only=True)
             if self._cur_is(TokenType.IDENTIFIER):
                 self._advance()
@@ -443,37 +989,37 @@ class Parser:
         self._skip_junk(
             want=TokenType.ASSIGN,
             hard_stop={TokenType.NUMBER, TokenType.SEMICOLON},
-            msg="Неожиданный токен '{val}' перед '='"
+            diagnostic=Diagnostic.UNEXPECTED_TOKEN_BEFORE_ASSIGN
         )
 
         if not self._match_repeated(TokenType.ASSIGN, "="):
             if self._cur_is(TokenType.SEMICOLON) and self._peek_is(1, TokenType.ASSIGN):
                 self._add_error(
                     self.current_token,
-                    "Лишняя точка с запятой перед '='",
+                    Diagnostic.EXTRA_SEMICOLON_BEFORE_ASSIGN,
                 )
                 self._advance()
             if not self._match_repeated(TokenType.ASSIGN, "="):
                 self._add_error(
-                    self.current_token or self._last(), "Пропущен '='", cursor_only=True)
+                    self.current_token or self._last(), Diagnostic.MISSING_ASSIGN, cursor_only=True)
 
         self._skip_junk(
             want=TokenType.NUMBER,
             hard_stop={TokenType.SEMICOLON},
-            msg="Неожиданный токен '{val}' перед числом"
+            diagnostic=Diagnostic.UNEXPECTED_TOKEN_BEFORE_NUMBER
         )
 
         number = self._match(TokenType.NUMBER)
         if not number and self._cur_is(TokenType.SEMICOLON) and self._peek_is(1, TokenType.NUMBER):
             self._add_error(
                 self.current_token,
-                "Лишняя точка с запятой перед числовым литералом",
+                Diagnostic.EXTRA_SEMICOLON_BEFORE_NUMBER,
             )
             self._advance()
             number = self._match(TokenType.NUMBER)
         if number:
             root.add_child(SyntaxTreeNode(
-                "value", number.value, number.line, number.start_pos))
+                "value", number.value, number.line, number.start_pos, literal=number.int_value))
         else:
             cur = self.current_token or self._last()
             is_float = (hasattr(self, '_float_before_pos')
@@ -481,32 +1027,32 @@ class Parser:
             is_float_at_end = (hasattr(self, '_float_end_pos')
                                and bool(self._float_end_pos))
             if not is_float and not is_float_at_end:
-                self._add_error(cur, "Ожидается числовой литерал", cursor_only=True)
+                self._add_error(cur, Diagnostic.NUMBER_EXPECTED, cursor_only=True)
 
         self._skip_junk(
             want=TokenType.SEMICOLON,
             hard_stop=set(),
-            msg="Неожиданный токен '{val}' перед ';'"
+            diagnostic=Diagnostic.UNEXPECTED_TOKEN_BEFORE_SEMICOLON
         )
 
         if not self._match_repeated(TokenType.SEMICOLON, ";"):
             cur = self.current_token or self._last()
             if cur and cur.type != TokenType.SEMICOLON:
                 if self.current_token is not None:
-                    self._add_error(cur, "Пропущен ';'", cursor_only=True)
+                    self._add_error(cur, Diagnostic.MISSING_SEMICOLON, cursor_only=True)
                 else:
-                    self._add_error(cur, "Пропущен ';'", cursor_only=True, insert_after=True)
+                    self._add_error(cur, Diagnostic.MISSING_SEMICOLON, cursor_only=True, insert_after=True)
             self._synchronize()
 
         return root
 
-    def _skip_junk(self, want, hard_stop, msg):
+    def _skip_junk(self, want, hard_stop, diagnostic):
         stop = hard_stop | SYNC_TOKENS
         while (self.current_token
                and self.current_token.type != want
                and self.current_token.type not in stop
                and self._lookahead(want, stop)):
-            self._add_error(self.current_token, msg.replace("{val}", self.current_token.value))
+            self._add_error(self.current_token, diagnostic, (self.current_token.value,))
             self._advance()
 
     def _peek_type_at(self, offset):
@@ -516,22 +1062,52 @@ class Parser:
         return None
 
     def _ident_ahead(self):
-        for i in range(self.position, len(self.significant_tokens)):
-            t = self.significant_tokens[i].type
-            if t == TokenType.IDENTIFIER:
-                return True
-            if t in SYNC_TOKENS:
-                return False
-        return False
+        pos = self.position
+        return self._next_index(TokenType.IDENTIFIER, pos) < self._next_sync[pos]
 
     def _lookahead(self, target, stop):
-        for i in range(self.position, len(self.significant_tokens)):
-            t = self.significant_tokens[i].type
-            if t == target:
-                return True
-            if t in stop:
-                return False
-        return False
+        pos = self.position
+        found = self._next_index(target, pos)
+        if found == len(self.significant_tokens):
+            return False
+        return all(found <= self._next_index(token_type, pos) for token_type in stop)
+
+    def _next_index(self, token_type, pos):
+        """Индекс первого токена token_type в significant_tokens[pos:] (или их число).
+
+        Таблицы «следующего вхождения» каждого типа и _next_sync строятся один раз
+        за разбор при первом обращении: на корректном тексте они не нужны, а на
+        длинных операторах без ';' заменяют повторные сканы вперёд.
+        """
+        table = self._lookahead_tables().get(token_type)
+        return table[pos] if table is not None else len(self.significant_tokens)
+
+    def _lookahead_tables(self):
+        if self._next_of is None:
+            self._build_lookahead_tables()
+        return self._next_of
+
+    def _build_lookahead_tables(self):
+        n = len(self.significant_tokens)
+        positions = {}
+        for i, token in enumerate(self.significant_tokens):
+            positions.setdefault(token.type, []).append(i)
+
+        self._next_of = {}
+        for token_type, indices in positions.items():
+            table = [n] * (n + 1)
+            prev = -1
+            for i in indices:
+                table[prev + 1:i + 1] = [i] * (i - prev)
+                prev = i
+            self._next_of[token_type] = table
+
+        absent = [n] * (n + 1)
+        self._next_sync = list(map(
+            min,
+            self._next_of.get(TokenType.SEMICOLON, absent),
+            self._next_of.get(TokenType.CONST, absent),
+        ))
 
     def _skip_to(self, target_type):
         self._advance()
@@ -544,25 +1120,17 @@ class Parser:
         return False
 
     def _declaration_ahead(self):
-        has_colon = False
-        has_type = False
-        has_assign = False
-        ident_count = 0
-        for i in range(self.position, len(self.significant_tokens)):
-            t = self.significant_tokens[i].type
-            if t == TokenType.COLON:
-                has_colon = True
-            elif t == TokenType.TYPE:
-                has_type = True
-            elif t == TokenType.ASSIGN:
-                has_assign = True
-            elif t == TokenType.IDENTIFIER:
-                ident_count += 1
-            if t == TokenType.CONST:
-                return False
-            if t in SYNC_TOKENS:
-                break
-        return has_colon or (has_type and has_assign) or (ident_count >= 2 and has_assign)
+        pos = self.position
+        sync = self._next_index(TokenType.SEMICOLON, pos)
+        if self._next_index(TokenType.CONST, pos) < sync:
+            return False
+        has_colon = self._next_index(TokenType.COLON, pos) < sync
+        has_type = self._next_index(TokenType.TYPE, pos) < sync
+        has_assign = self._next_index(TokenType.ASSIGN, pos) < sync
+        first_ident = self._next_index(TokenType.IDENTIFIER, pos)
+        two_idents = (first_ident < sync
+                      and self._next_index(TokenType.IDENTIFIER, first_ident + 1) < sync)
+        return has_colon or (has_type and has_assign) or (two_idents and has_assign)
 
     def _report_unexpected_sequence_and_sync(self):
         start_idx = self.position
@@ -579,11 +1147,11 @@ class Parser:
         first = self.significant_tokens[start_idx]
         combined = ''.join(parts)
         if len(parts) == 1:
-            self._add_error(first, f"Неожиданный токен '{combined}'")
+            self._add_error(first, Diagnostic.UNEXPECTED_TOKEN, (combined,))
         else:
             self._add_error(
                 first,
-                f"Неожиданная последовательность символов '{combined}'",
+                Diagnostic.UNEXPECTED_SEQUENCE, (combined,),
                 fragment=combined,
             )
         self.position = i
@@ -609,9 +1177,9 @@ class Parser:
             count += 1
             self._advance()
         if count > 1:
-            self.errors.append(ParserError(
+            self._append_error(ParserError(
                 symbol * count, start.line, start.start_pos,
-                f"Повторяющийся оператор '{symbol}' ({count} раз)"
+                Diagnostic.REPEATED_OPERATOR, (symbol, count)
             ))
         return True
 
@@ -639,7 +1207,7 @@ class Parser:
     def _last(self):
         return self.significant_tokens[-1] if self.significant_tokens else None
 
-    def _add_error(self, token, description, *, cursor_only=False,
+    def _add_error(self, token, diagnostic, args=(), *, cursor_only=False,
                    insert_after=False, const_insert=False, fragment=None):
         if token:
             line = token.line
@@ -653,11 +1221,16 @@ class Parser:
             else:
                 col = token.start_pos
             frag = fragment if fragment is not None else token.value
-            self.errors.append(ParserError(
-                frag, line, col, description, cursor_only=cursor_only))
+            self._append_error(ParserError(
+                frag, line, col, diagnostic, args, cursor_only=cursor_only))
         else:
-            self.errors.append(ParserError(
-                "EOF", 0, 0, description, cursor_only=cursor_only))
+            self._append_error(ParserError(
+                "EOF", 0, 0, diagnostic, args, cursor_only=cursor_only))
+
+    def _append_error(self, error):
+        if self.max_errors is not None and len(self.errors) >= self.max_errors:
+            raise _ErrorBudgetExceeded
+        self.errors.append(error)
 
     def _advance(self):
         self.position += 1
@@ -667,4 +1240,165 @@ class Parser:
         if self.position < len(self.significant_tokens):
             self.current_token = self.significant_tokens[self.position]
         else:
-            self.current_token = None
\ No newline at end of file
+            self.current_token = None
+
+def _truncation_error(last, max_errors):
+    if max_errors is not None:
+        diagnostic, args = Diagnostic.ERROR_LIMIT_EXCEEDED, (max_errors,)
+    else:
+        diagnostic, args = Diagnostic.ANALYSIS_STOPPED, ()
+    return ParserError(
+        "", last.line if last else 0, last.position if last else 0, diagnostic, args
+    )
+
+
+def _stream_windows(tokens, max_window):
+    """Окна Parser.iter_declarations: режутся сразу после ';' из «число ; const»."""
+    window = []
+    cut = 0
+    before_last = last = None
+    for token in tokens:
+        token_type = token.type
+        if token_type is TokenType.ERROR or token_type in TRIVIA_TOKENS:
+            window.append(token)
+        else:
+            if (token_type is TokenType.CONST
+                    and last is TokenType.SEMICOLON and before_last is TokenType.NUMBER):
+                yield window[:cut]
+                window = window[cut:]
+                cut = 0
+            window.append(token)
+            before_last, last = last, token_type
+            if token_type is TokenType.SEMICOLON:
+                cut = len(window)
+        if len(window) > max_window:
+            if not cut:
+                cut = len(window)
+            yield window[:cut]
+            window = window[cut:]
+            cut = 0
+    if window:
+        yield window
+
+
+def _split_errors(root, errors):
+    """Пары (объявление, ошибки) окна: ошибка относится к последнему объявлению,
+    начавшемуся не позже неё (ошибки до первого — к первому).
+
+    Объявления SyntaxArena становятся узлами только по мере выдачи.
+    """
+    if isinstance(root, SyntaxArena):
+        count = root.count
+        declaration_at = root.declaration
+        starts = []
+        previous = (0, 0)
+        kinds, lines, positions = root.kinds, root.lines, root.positions
+        for declaration in range(1, count):
+            base = declaration * _ROW_WIDTH
+            for slot in range(base, base + _ROW_WIDTH):
+                if kinds[slot] != _EMPTY_SLOT:
+                    previous = (lines[slot], positions[slot])
+                    break
+            starts.append(previous)
+    else:
+        declarations = root.children if root is not None else []
+        count = len(declarations)
+        declaration_at = declarations.__getitem__
+        starts = []
+        previous = (0, 0)
+        for declaration in declarations[1:]:
+            if declaration.children:
+                first = declaration.children[0]
+                previous = (first.line, first.position)
+            starts.append(previous)
+    if not count:
+        if errors:
+            yield None, errors
+        return
+    grouped = [[] for _ in range(count)]
+    for error in errors:
+        grouped[bisect_right(starts, (error.line, error.position))].append(error)
+    for index, node_errors in enumerate(grouped):
+        yield declaration_at(index), node_errors
+
+
+def _shard_columns(tokens):
+    """Участок потока в виде колонок: array и списки уже существующих значений
+    передаются в процесс быстрее, чем по объекту или кортежу на токен."""
+    return (
+        bytes(_TYPE_CODES[t.type] for t in tokens),
+        [t.value for t in tokens],
+        array('i', [t.line for t in tokens]),
+        array('i', [t.start_pos for t in tokens]),
+        array('i', [t.end_pos for t in tokens]),
+        [t.int_value for t in tokens],
+    )
+
+
+def _declarations_to_columns(declarations):
+    counts = bytearray()
+    kinds = bytearray()
+    values = []
+    lines = array('i')
+    positions = array('i')
+    literals = []
+    for declaration in declarations:
+        counts.append(len(declaration.children))
+        for child in declaration.children:
+            kinds.append(_NODE_KIND_CODES[child.node_type])
+            values.append(child.value)
+            lines.append(child.line)
+            positions.append(child.position)
+            literals.append(child.literal)
+    return bytes(counts), bytes(kinds), values, lines, positions, literals
+
+
+def _declarations_from_columns(columns):
+    counts, kinds, values, lines, positions, literals = columns
+    declarations = []
+    index = 0
+    for count in counts:
+        declaration = SyntaxTreeNode("const_declaration")
+        for i in range(index, index + count):
+            declaration.children.append(SyntaxTreeNode(
+                _NODE_KINDS[kinds[i]], values[i], lines[i], positions[i], literal=literals[i]))
+        index += count
+        declarations.append(declaration)
+    return declarations
+
+
+def _errors_to_columns(errors):
+    return (
+        [e.fragment for e in errors],
+        array('i', [e.line for e in errors]),
+        array('i', [e.position for e in errors]),
+        [e.diagnostic for e in errors],
+        [e.args for e in errors],
+        bytes(e.cursor_only for e in errors),
+    )
+
+
+def _errors_from_columns(columns):
+    return [
+        ParserError(fragment, line, position, diagnostic, args, cursor_only=bool(cursor_only))
+        for fragment, line, position, diagnostic, args, cursor_only in zip(*columns)
+    ]
+
+
+def _parse_shard(columns, float_before_pos, float_end_pos, engine):
+    """Точка входа рабочего процесса parse_parallel.
+
+    Объявления и ошибки участка возвращаются колонками: распаковка дерева
+    объектами в родительском процессе стоила дороже самого разбора.
+    """
+    codes, values, lines, starts, ends, int_values = columns
+    parser = Parser(engine=engine)
+    parser.significant_tokens = [
+        Token(_TOKEN_TYPES[code], value, line, start, end, int_value)
+        for code, value, line, start, end, int_value
+        in zip(codes, values, lines, starts, ends, int_values)
+    ]
+    parser._float_before_pos = float_before_pos
+    parser._float_end_pos = float_end_pos
+    root, _ = parser._parse_significant()
+    return _declarations_to_columns(root.children), _errors_to_columns(parser.errors)
@@ -1,10 +1,13 @@
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
 
-from lexical_analyzer import LexicalAnalyzer, Token, TokenType
-from parser import Parser, ParserError, SyntaxTreeNode
+from diagnostics import Diagnostic
+from lexical_analyzer import LexicalAnalyzer, Token, TokenType, decode_int_literal
+from parser import TRIVIA_TOKENS, Parser, ParserError, SyntaxArena, SyntaxTreeNode, write_lines
+from symbol_table import SymbolTable
 
 
 @dataclass
@@ -32,13 +35,47 @@ class Program:
     declarations: List[ConstDeclNode] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(init=False)
 class SemanticError:
-    message: str
+    """Код диагностики и аргументы; текст message собирается по запросу (см. diagnostics).
+
+    Прежний вызов SemanticError(message, line, column, fragment="") (в том числе
+    с message=... по имени) тоже принимается: готовый текст становится
+    аргументом Diagnostic.SEMANTIC_MESSAGE.
+    """
+
+    diagnostic: Diagnostic
+    args: tuple
     line: int
     column: int
     fragment: str = ""
 
+    def __init__(self, diagnostic=None, args=(), line=0, column=0, fragment="", *, message=None):
+        if message is None and isinstance(diagnostic, str):
+            # Позиционные аргументы прежнего вызова сдвинуты на одно место:
+            # (message, line, column[, fragment]) попали в (diagnostic, args, line[, column])
+            if isinstance(column, str):
+                fragment = column
+            message, line, column = diagnostic, args, line
+        if message is not None:
+            diagnostic, args = Diagnostic.SEMANTIC_MESSAGE, (message,)
+        self.diagnostic = diagnostic
+        self.args = args
+        self.line = line
+        self.column = column
+        self.fragment = fragment
+
+    @property
+    def code(self) -> str:
+        return self.diagnostic.code
+
+    @property
+    def message(self) -> str:
+        return self.diagnostic.render(self.args)
+
+    def render(self, language: Optional[str] = None) -> str:
+        return self.diagnostic.render(self.args, language)
+
     def format_line(self) -> str:
         return f"{self.message} | строка {self.line}, символ {self.column}"
 
@@ -57,258 +94,427 @@ TYPE_RANGE: Dict[str, Tuple[int, int]] = {
 }
 
 
-def _syntax_child(decl: SyntaxTreeNode, kind: str) -> Optional[SyntaxTreeNode]:
-    for c in decl.children:
-        if c.node_type == kind:
-            return c
-    return None
-
-
 def _literal_int(val_node: Optional[SyntaxTreeNode]) -> Optional[int]:
     if val_node is None or val_node.value is None:
         return None
-    try:
-        return int(val_node.value, 10)
-    except ValueError:
-        return None
+    if val_node.literal is not None:
+        return val_node.literal
+    return decode_int_literal(val_node.value)
+
+
+# Объявление для семантического прохода: узел AST и позиции имени, типа и значения
+# (строка, столбец; 0 — части нет), текст литерала
+_DeclRow = Tuple[ConstDeclNode, int, int, int, int, int, int, Optional[str]]
+
+
+def _node_rows(decls: List[SyntaxTreeNode]) -> Iterator[_DeclRow]:
+    for node in decls:
+        kw = ident = typ = val = None
+        for c in node.children:
+            kind = c.node_type
+            if kind == "identifier":
+                if ident is None:
+                    ident = c
+            elif kind == "type":
+                if typ is None:
+                    typ = c
+            elif kind == "value":
+                if val is None:
+                    val = c
+            elif kind == "keyword":
+                if kw is None:
+                    kw = c
+        ival = _literal_int(val)
+        first = ident or typ or val or kw
+        decl = ConstDeclNode(
+            name=ident.value if ident else None,
+            modifiers=[kw.value] if kw is not None and kw.value else [],
+            type_node=TypeNode(name=typ.value) if typ and typ.value else None,
+            value=IntegerLiteralNode(value=ival) if ival is not None else None,
+            line=first.line if first else None,
+            column=first.position if first else None,
+        )
+        yield (
+            decl,
+            ident.line if ident else 0,
+            ident.position if ident else 0,
+            typ.line if typ else 0,
+            typ.position if typ else 0,
+            val.line if val else 0,
+            val.position if val else 0,
+            val.value if val else None,
+        )
+
+
+def _arena_rows(arena: SyntaxArena) -> Iterator[_DeclRow]:
+    """_node_rows для SyntaxArena: поля читаются прямо из её массивов."""
+    kinds, values, lines, positions = arena.kinds, arena.values, arena.lines, arena.positions
+    literals = arena.literals
+    for index in range(arena.count):
+        base = index * 4
+        has_kw = kinds[base] == 0
+        has_ident = kinds[base + 1] == 1
+        has_type = kinds[base + 2] == 2
+        has_val = kinds[base + 3] == 3
+        val = values[base + 3] if has_val else None
+        ival = None
+        if val is not None:
+            literal = literals[index]
+            ival = literal if literal is not None else decode_int_literal(val)
+        if has_ident:
+            first = base + 1
+        elif has_type:
+            first = base + 2
+        elif has_val:
+            first = base + 3
+        else:
+            first = base if has_kw else -1
+        kw = values[base] if has_kw else None
+        typ = values[base + 2] if has_type else None
+        decl = ConstDeclNode(
+            name=values[base + 1] if has_ident else None,
+            modifiers=[kw] if kw else [],
+            type_node=TypeNode(name=typ) if typ else None,
+            value=IntegerLiteralNode(value=ival) if ival is not None else None,
+            line=lines[first] if first >= 0 else None,
+            column=positions[first] if first >= 0 else None,
+        )
+        yield (
+            decl,
+            lines[base + 1] if has_ident else 0,
+            positions[base + 1] if has_ident else 0,
+            lines[base + 2] if has_type else 0,
+            positions[base + 2] if has_type else 0,
+            lines[base + 3] if has_val else 0,
+            positions[base + 3] if has_val else 0,
+            val,
+        )
+
+
+def _declaration_rows(root: Optional[Union[SyntaxTreeNode, SyntaxArena]]) -> Iterator[_DeclRow]:
+    """Объявления дерева разбора за один проход по узлам (каждый узел — один раз)."""
+    if root is None:
+        return iter(())
+    if isinstance(root, SyntaxArena):
+        return _arena_rows(root)
+    if root.node_type != "program":
+        return _node_rows([root])
+    return _node_rows([c for c in root.children if c.node_type == "const_declaration"])
 
 
-def _int_literal_from_syntax(val: Optional[SyntaxTreeNode]) -> Optional[IntegerLiteralNode]:
-    if val is None or val.value is None:
-        return None
-    try:
-        return IntegerLiteralNode(value=int(val.value, 10))
-    except ValueError:
+def build_ast_from_syntax_tree(
+    root: Optional[Union[SyntaxTreeNode, SyntaxArena]],
+) -> Optional[Program]:
+    if root is None:
         return None
+    return Program(declarations=[row[0] for row in _declaration_rows(root)])
 
 
-def _syntax_decl_to_ast(node: SyntaxTreeNode) -> ConstDeclNode:
-    kw = _syntax_child(node, "keyword")
-    ident = _syntax_child(node, "identifier")
-    typ = _syntax_child(node, "type")
-    val = _syntax_child(node, "value")
-    modifiers: List[str] = []
-    if kw is not None and kw.value:
-        modifiers.append(kw.value)
-    type_node = TypeNode(name=typ.value) if typ and typ.value else None
-    line = None
-    col = None
-    for part in (ident, typ, val, kw):
-        if part is not None:
-            line = part.line
-            col = part.position
-            break
-    return ConstDeclNode(
-        name=ident.value if ident else None,
-        modifiers=modifiers,
-        type_node=type_node,
-        value=_int_literal_from_syntax(val),
-        line=line,
-        column=col,
-    )
+def _chunk_refs(tokens: List[Token], trivia_free: bool = False) -> Dict[int, List[Token]]:
+    """То же, что Parser.chunk_refs, прямым проходом по лексемам (trivia_free не влияет).
 
+    Участки — непустые группы значимых лексем между ';' по порядку; для участка
+    с идентификаторами после первого '=' — эти идентификаторы.
+    """
+    refs: Dict[int, List[Token]] = {}
+    for _ in _iter_with_refs(tokens, refs):
+        pass
+    return refs
 
-def build_ast_from_syntax_tree(root: Optional[SyntaxTreeNode]) -> Optional[Program]:
-    if root is None:
-        return None
-    if root.node_type != "program":
-        return Program(declarations=[_syntax_decl_to_ast(root)])
-    decls = [
-        _syntax_decl_to_ast(c)
-        for c in root.children
-        if c.node_type == "const_declaration"
-    ]
-    return Program(declarations=decls)
 
+def _iter_with_refs(tokens: Iterable[Token], refs: Dict[int, List[Token]]) -> Iterator[Token]:
+    """Пропускает лексемы дальше, попутно заполняя refs, как _chunk_refs.
+
+    Пробельные лексемы не учитываются всегда, как и в Parser._prepass.
 
-def _significant(tokens: List[Token]) -> List[Token]:
-    out: List[Token] = []
+    Список участка попадает в refs с первой же ссылкой и дополняется
+    по мере чтения — потоковый потребитель видит его, не дожидаясь ';'.
+    """
+    chunk = 0
+    chunk_open = False
+    after_assign = False
+    current: Optional[List[Token]] = None
     for t in tokens:
-        if t.type in (TokenType.SPACE, TokenType.TAB, TokenType.NEWLINE):
+        yield t
+        token_type = t.type
+        if token_type is TokenType.ERROR or token_type in TRIVIA_TOKENS:
             continue
-        if t.is_error:
+        if token_type is TokenType.SEMICOLON:
+            if chunk_open:
+                current = None
+                chunk += 1
+                chunk_open = after_assign = False
             continue
-        out.append(t)
-    return out
-
-
-def _split_by_semicolon(sig: List[Token]) -> List[List[Token]]:
-    chunks: List[List[Token]] = []
-    cur: List[Token] = []
-    for t in sig:
-        if t.type == TokenType.SEMICOLON:
-            if cur:
-                chunks.append(cur)
-                cur = []
-        else:
-            cur.append(t)
-    if cur:
-        chunks.append(cur)
-    return chunks
-
-
-def _refs_after_assign(chunk: List[Token]) -> List[Token]:
-    refs: List[Token] = []
-    eq_idx = None
-    for i, t in enumerate(chunk):
-        if t.type == TokenType.ASSIGN:
-            eq_idx = i
-            break
-    if eq_idx is None:
-        return refs
-    i = eq_idx + 1
-    while i < len(chunk):
-        t = chunk[i]
-        if t.type == TokenType.IDENTIFIER:
-            refs.append(t)
-        i += 1
-    return refs
-
-
-def _syntax_declarations(root: Optional[SyntaxTreeNode]) -> List[SyntaxTreeNode]:
-    if root is None:
-        return []
-    if root.node_type != "program":
-        if root.node_type == "const_declaration":
-            return [root]
-        return []
-    return [c for c in root.children if c.node_type == "const_declaration"]
-
-
-def format_ast_single_tree(program: Optional[Program]) -> str:
+        chunk_open = True
+        if after_assign:
+            if token_type is TokenType.IDENTIFIER:
+                if current is None:
+                    current = refs[chunk] = []
+                current.append(t)
+        elif token_type is TokenType.ASSIGN:
+            after_assign = True
+
+
+def iter_ast_lines(program: Optional[Program]) -> Iterator[str]:
+    """Строки format_ast_single_tree (без '\\n') по одной, без списка всех строк."""
     if program is None:
-        return "(нет дерева разбора)\n"
+        yield "(нет дерева разбора)"
+        return
     if not program.declarations:
-        return "Program\n└── (нет объявлений)\n"
-    out: List[str] = ["Program"]
+        yield "Program"
+        yield "└── (нет объявлений)"
+        return
+    yield "Program"
     nd = len(program.declarations)
     for di, decl in enumerate(program.declarations):
         last_decl = di == nd - 1
         p = "└── " if last_decl else "├── "
-        out.append(p + "ConstDeclNode")
+        yield p + "ConstDeclNode"
         bar = "    " if last_decl else "│   "
-        out.append(bar + "├── " + (f'name: "{decl.name}"' if decl.name else "name: null"))
-        out.append(bar + "├── " + f"modifiers: {decl.modifiers!r}")
+        yield bar + "├── " + (f'name: "{decl.name}"' if decl.name else "name: null")
+        yield bar + "├── " + f"modifiers: {decl.modifiers!r}"
         if decl.type_node is not None:
-            out.append(bar + "├── " + "type: TypeNode")
-            out.append(bar + "│   " + "└── " + f'name: "{decl.type_node.name}"')
+            yield bar + "├── " + "type: TypeNode"
+            yield bar + "│   " + "└── " + f'name: "{decl.type_node.name}"'
         else:
-            out.append(bar + "├── " + "type: null")
+            yield bar + "├── " + "type: null"
         if decl.value is not None:
-            out.append(bar + "└── " + "value: IntegerLiteralNode")
-            out.append(bar + "    " + "└── " + f"value: {decl.value.value}")
+            yield bar + "└── " + "value: IntegerLiteralNode"
+            yield bar + "    " + "└── " + f"value: {decl.value.value}"
         else:
-            out.append(bar + "└── " + "value: null")
-    return "\n".join(out) + "\n"
+            yield bar + "└── " + "value: null"
+
+
+def format_ast_single_tree(program: Optional[Program]) -> str:
+    return "\n".join(iter_ast_lines(program)) + "\n"
+
+
+def write_ast(
+    program: Optional[Program],
+    sink: TextIO,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> Tuple[int, bool]:
+    """Потоковый format_ast_single_tree в sink; limit/offset — в строках (см. write_lines)."""
+    return write_lines((line + "\n" for line in iter_ast_lines(program)), sink, limit, offset)
 
 
 def analyze_semantics_from_parse(
     tokens: List[Token],
-    syntax_tree: Optional[SyntaxTreeNode],
+    syntax_tree: Optional[Union[SyntaxTreeNode, SyntaxArena]],
     syntax_errors: List[ParserError],
+    trivia_free: bool = False,
+    chunk_refs: Optional[Dict[int, List[Token]]] = None,
+    symbols: Optional[SymbolTable] = None,
 ) -> Tuple[Optional[Program], Optional[Program], List[SemanticError], List[ParserError]]:
-    full_ast = build_ast_from_syntax_tree(syntax_tree)
+    """syntax_tree — дерево SyntaxTreeNode или SyntaxArena (Parser(arena=True)).
+
+    Один проход по объявлениям строит AST, таблицу имён и семантические ошибки.
+    Ссылки после '=' берутся по номеру участка между ';' (i-й участок проверяется
+    вместе с i-м объявлением); chunk_refs — Parser.chunk_refs после
+    parse(..., collect_refs=True), иначе они собираются из tokens. symbols —
+    компактная таблица имён SymbolTable, которую проход заполнит корректными
+    объявлениями (для очень больших программ); по умолчанию — обычный словарь
+    имя -> строка, он быстрее.
+    """
+    if chunk_refs is None:
+        chunk_refs = _chunk_refs(tokens, trivia_free)
+    table = symbols
+    if symbols is None:
+        # Имя -> строка объявления
+        symbols = {}
 
     sem_errors: List[SemanticError] = []
-    decl_faulty: set = set()
-
-    sig = _significant(tokens)
-    chunks = _split_by_semicolon(sig)
-    decl_nodes = _syntax_declarations(syntax_tree)
-
-    symbols: Dict[str, Tuple[int, int]] = {}
-
-    n = max(len(chunks), len(decl_nodes))
-    for idx in range(n):
-        chunk = chunks[idx] if idx < len(chunks) else None
-        syn = decl_nodes[idx] if idx < len(decl_nodes) else None
-
-        ident_n = _syntax_child(syn, "identifier") if syn else None
-        type_n = _syntax_child(syn, "type") if syn else None
-        val_n = _syntax_child(syn, "value") if syn else None
-
-        name = ident_n.value if ident_n and ident_n.value else None
-        typ = type_n.value if type_n and type_n.value else None
-        ival = _literal_int(val_n)
+    full_decls: List[ConstDeclNode] = []
+    valid_decls: List[ConstDeclNode] = []
 
-        name_line = ident_n.line if ident_n else 0
-        name_col = ident_n.position if ident_n else 0
+    for idx, row in enumerate(_declaration_rows(syntax_tree)):
+        decl, name_line, name_col = row[0], row[1], row[2]
+        full_decls.append(decl)
+        name = decl.name or None
+        typ = decl.type_node.name if decl.type_node is not None else None
+        ival = decl.value.value if decl.value is not None else None
 
         if name and name in symbols:
-            prev_line = symbols[name][0]
             sem_errors.append(
                 SemanticError(
-                    f'Ошибка: идентификатор "{name}" уже объявлен ранее (строка {prev_line})',
+                    Diagnostic.DUPLICATE_IDENTIFIER,
+                    (name, symbols[name]),
                     name_line,
                     name_col,
                     fragment=name,
                 )
             )
-            decl_faulty.add(idx)
             continue
 
-        if typ and ival is not None and typ in TYPE_RANGE:
-            lo, hi = TYPE_RANGE[typ]
-            if not (lo <= ival <= hi):
-                vc = val_n.position if val_n else name_col
-                vl = val_n.line if val_n else name_line
-                frag = val_n.value if val_n and val_n.value else str(ival)
-                sem_errors.append(
-                    SemanticError(
-                        f"Ошибка: значение {ival} вне допустимого диапазона для типа {typ} "
-                        f"([{lo}, {hi}]); несовместимость типа инициализатора",
-                        vl,
-                        vc,
-                        fragment=frag,
-                    )
-                )
-                decl_faulty.add(idx)
-        elif typ and ival is not None and typ not in TYPE_RANGE:
+        faulty = False
+        if typ and ival is not None:
+            range_error = _range_error(typ, ival, row)
+            if range_error is not None:
+                sem_errors.append(range_error)
+                faulty = True
+
+        refs = chunk_refs.get(idx)
+        if refs and _check_refs(refs, symbols, sem_errors):
+            faulty = True
+
+        if not faulty:
+            if name:
+                if table is not None:
+                    table.add(name, name_line, name_col)
+                else:
+                    symbols[name] = name_line
+            valid_decls.append(decl)
+
+    # Участков с ссылками больше, чем объявлений: проверяются только ссылки
+    for idx in sorted(chunk_refs):
+        if idx >= len(full_decls):
+            _check_refs(chunk_refs[idx], symbols, sem_errors)
+
+    if syntax_tree is None:
+        return None, None, sem_errors, syntax_errors
+    return Program(declarations=full_decls), Program(declarations=valid_decls), sem_errors, syntax_errors
+
+
+def _range_error(typ: str, ival: int, row: _DeclRow) -> Optional[SemanticError]:
+    """Ошибка неизвестного типа или значения вне диапазона для объявления row (или None)."""
+    bounds = TYPE_RANGE.get(typ)
+    if bounds is None:
+        return SemanticError(
+            Diagnostic.UNKNOWN_TYPE,
+            (typ,),
+            row[3],
+            row[4],
+            fragment=typ,
+        )
+    if not (bounds[0] <= ival <= bounds[1]):
+        return SemanticError(
+            Diagnostic.VALUE_OUT_OF_RANGE,
+            (ival, typ, bounds[0], bounds[1]),
+            row[5],
+            row[6],
+            fragment=row[7] or str(ival),
+        )
+    return None
+
+
+def _check_refs(refs: List[Token], symbols: Union[Dict[str, int], SymbolTable], sem_errors: List[SemanticError]) -> bool:
+    """Ошибки для необъявленных ссылок refs; True, если такие были."""
+    found = False
+    for ref in refs:
+        if ref.value not in symbols:
             sem_errors.append(
                 SemanticError(
-                    f"Ошибка: неизвестный тип {typ} для проверки диапазона",
-                    type_n.line if type_n else name_line,
-                    type_n.position if type_n else name_col,
-                    fragment=typ,
+                    Diagnostic.UNDECLARED_IDENTIFIER,
+                    (ref.value,),
+                    ref.line,
+                    ref.start_pos,
+                    fragment=ref.value,
                 )
             )
-            decl_faulty.add(idx)
-
-        if chunk:
-            for ref in _refs_after_assign(chunk):
-                if ref.value not in symbols:
-                    sem_errors.append(
-                        SemanticError(
-                            f'Ошибка: идентификатор "{ref.value}" используется без предшествующего объявления',
-                            ref.line,
-                            ref.start_pos,
-                            fragment=ref.value,
-                        )
-                    )
-                    decl_faulty.add(idx)
-
-        if name and idx not in decl_faulty:
-            symbols[name] = (name_line, name_col)
-
-    valid_decls: List[ConstDeclNode] = []
-    if full_ast:
-        for i, d in enumerate(full_ast.declarations):
-            if i not in decl_faulty:
-                valid_decls.append(d)
-
-    valid_ast: Optional[Program] = None
-    if full_ast is not None:
-        valid_ast = Program(declarations=valid_decls)
-
-    return full_ast, valid_ast, sem_errors, syntax_errors
+            found = True
+    return found
 
 
 def analyze_semantics(
     source: str,
+    trivia_free: bool = False,
+    max_errors: Optional[int] = None,
+    symbols: Optional[SymbolTable] = None,
 ) -> Tuple[Optional[Program], Optional[Program], List[SemanticError], List[ParserError]]:
-    tokens = LexicalAnalyzer().analyze(source)
-    syntax_tree, syntax_errors = Parser().parse(tokens)
-    return analyze_semantics_from_parse(tokens, syntax_tree, syntax_errors)
+    """max_errors — общий бюджет ошибок лексера и парсера (см. Parser.mark_truncated);
+    symbols — см. analyze_semantics_from_parse."""
+    analyzer = LexicalAnalyzer(skip_trivia=trivia_free, max_errors=max_errors)
+    tokens = analyzer.analyze(source)
+    parser = Parser(max_errors=max_errors)
+    syntax_tree, syntax_errors = parser.parse(tokens, trivia_free=trivia_free, collect_refs=True)
+    if analyzer.truncated:
+        parser.mark_truncated()
+    return analyze_semantics_from_parse(tokens, syntax_tree, syntax_errors, trivia_free,
+                                        chunk_refs=parser.chunk_refs, symbols=symbols)
+
+
+# Корректное объявление целиком, как его видят лексер и парсер: пробелы, табуляции
+# и переводы строк между лексемами, литерал — по правилам лексера. ';' сразу после
+# объявления парсер сочтёт повтором оператора, поэтому такое объявление не подходит.
+_VALID_DECLARATION_RE = re.compile(
+    r"[ \t\n]*const[ \t\n]+([A-Za-z_][A-Za-z0-9_]*)[ \t\n]*:[ \t\n]*"
+    r"([iu](?:8|16|32|64|128))[ \t\n]*=[ \t\n]*"
+    r"(0x_*[0-9a-fA-F][0-9a-fA-F_]*|0o_*[0-7][0-7_]*|0b_*[01][01_]*|[0-9][0-9_]*)"
+    r"[ \t\n]*;(?![ \t\n]*;)"
+)
+_TRAILING_SPACE_RE = re.compile(r"[ \t\n]*")
+_RESERVED_WORDS = frozenset(TYPE_RANGE) | {"const"}
+
+
+def _line_and_column(source: str, offset: int) -> Tuple[int, int]:
+    line_start = source.rfind("\n", 0, offset) + 1
+    return source.count("\n", 0, line_start) + 1, offset - line_start + 1
+
+
+def recognize(source: str) -> Tuple[bool, Optional[Union[ParserError, SemanticError]]]:
+    """Быстрая проверка «корректен ли текст»: (True, None) или (False, первая ошибка).
+
+    Корректные объявления распознаются одним регулярным выражением подряд
+    с начала текста и сразу проверяются на повтор имени и диапазон типа,
+    без списка лексем и дерева разбора. На первом нераспознанном объявлении
+    лексер и парсер запускаются только для хвоста текста, начиная с последнего
+    распознанного (перед ним разбор всегда в чистом состоянии), и возвращается первая
+    синтаксическая ошибка. Если синтаксических ошибок нет, ответ даёт
+    полный analyze_semantics. Вердикт совпадает с analyze_semantics.
+    """
+    match_declaration = _VALID_DECLARATION_RE.match
+    symbols: Dict[str, int] = {}
+    pos = last = 0
+    while True:
+        m = match_declaration(source, pos)
+        if m is None:
+            break
+        name, typ, literal = m.group(1, 2, 3)
+        ival = decode_int_literal(literal)
+        if name in _RESERVED_WORDS or ival is None:
+            break
+        if name in symbols:
+            prev_line, _ = _line_and_column(source, symbols[name])
+            line, col = _line_and_column(source, m.start(1))
+            return False, SemanticError(
+                Diagnostic.DUPLICATE_IDENTIFIER,
+                (name, prev_line),
+                line,
+                col,
+                fragment=name,
+            )
+        lo, hi = TYPE_RANGE[typ]
+        if not (lo <= ival <= hi):
+            line, col = _line_and_column(source, m.start(3))
+            return False, SemanticError(
+                Diagnostic.VALUE_OUT_OF_RANGE,
+                (ival, typ, lo, hi),
+                line,
+                col,
+                fragment=literal,
+            )
+        symbols[name] = m.start(1)
+        last, pos = pos, m.end()
+
+    if _TRAILING_SPACE_RE.match(source, pos).end() == len(source):
+        return True, None
+
+    # Хвост берётся с последнего распознанного объявления: его ';' вместе с ';'
+    # после мусора парсер считает повтором оператора. Номера строк и столбцов
+    # сохраняются: начало первой строки хвоста заменяется пробелами.
+    line, col = _line_and_column(source, last)
+    tokens = LexicalAnalyzer(skip_trivia=True).analyze(" " * (col - 1) + source[last:])
+    if line > 1:
+        for token in tokens:
+            token.line += line - 1
+    _, syntax_errors = Parser(engine="table").parse(tokens, trivia_free=True)
+    if syntax_errors:
+        return False, syntax_errors[0]
+
+    _, _, sem_errors, syntax_errors = analyze_semantics(source, trivia_free=True)
+    errors = syntax_errors or sem_errors
+    return (False, errors[0]) if errors else (True, None)
 
 
 def format_analysis_report(
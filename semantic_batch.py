@@ -0,0 +1,206 @@
+"""Пакетный семантический проход: проверки по колонкам SyntaxArena средствами NumPy.
+
+Колонки (номер имени, код типа, значение) читаются прямо из массивов арены,
+без узлов AST: имена и ссылки интернируются в целые номера, диапазоны
+проверяются векторно по границам типа, первое регистрирующее объявление
+каждого имени находится через np.unique по номерам. Ссылки после '='
+проверяются тоже векторно (см. _ref_faults). Ошибки и их порядок совпадают
+с analyze_semantics_from_parse; AST не строится.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # numpy необязателен: без него работает обычный проход
+    np = None
+
+from diagnostics import Diagnostic
+from lexical_analyzer import Token, decode_int_literal
+from parser import ParserError, SyntaxArena, SyntaxTreeNode
+from semantic_analysis import (
+    TYPE_RANGE,
+    SemanticError,
+    _chunk_refs,
+    _range_error,
+    analyze_semantics_from_parse,
+)
+
+_TYPE_NAMES = tuple(TYPE_RANGE)
+_TYPE_CODES = {name: code for code, name in enumerate(_TYPE_NAMES)}
+_UNKNOWN_TYPE = -1
+
+_INT64_MIN = -(2**63)
+_INT64_MAX = 2**63 - 1
+
+if np is not None:
+    # Границы типов, урезанные до int64: для значения, помещающегося в int64,
+    # сравнение с урезанной границей даёт тот же ответ, что и с настоящей
+    _LOW64 = np.array([max(TYPE_RANGE[name][0], _INT64_MIN) for name in _TYPE_NAMES], dtype=np.int64)
+    _HIGH64 = np.array([min(TYPE_RANGE[name][1], _INT64_MAX) for name in _TYPE_NAMES], dtype=np.int64)
+    # Номер объявления для имени без регистрирующего объявления
+    _NEVER = np.iinfo(np.int64).max
+
+
+def analyze_semantics_batch(
+    tokens: List[Token],
+    syntax_tree: Optional[Union[SyntaxTreeNode, SyntaxArena]],
+    syntax_errors: List[ParserError],
+    trivia_free: bool = False,
+    chunk_refs: Optional[Dict[int, List[Token]]] = None,
+) -> Tuple[int, List[SemanticError], List[ParserError]]:
+    """Семантические ошибки analyze_semantics_from_parse без построения AST.
+
+    Возвращает (число объявлений, семантические ошибки, синтаксические ошибки).
+    Дерево SyntaxTreeNode сначала переносится в SyntaxArena — быстрее всего
+    движок работает с Parser(arena=True). Без numpy работает обычный проход.
+    """
+    if chunk_refs is None:
+        chunk_refs = _chunk_refs(tokens, trivia_free)
+    if np is None:
+        full, _, sem_errors, syntax_errors = analyze_semantics_from_parse(
+            tokens, syntax_tree, syntax_errors, trivia_free, chunk_refs=chunk_refs)
+        return len(full.declarations) if full is not None else 0, sem_errors, syntax_errors
+
+    arena = _as_arena(syntax_tree)
+    count = arena.count
+    kinds = np.frombuffer(arena.kinds, dtype=np.uint8).reshape(count, 4).copy()
+    has_name = kinds[:, 1] == 1
+    values = arena.values
+
+    # Имена объявлений и ссылок — номера в одном словаре интернирования
+    interned: Dict[str, int] = {}
+    intern = interned.setdefault
+    name_ids = np.array([intern(name, len(interned)) for name in values[1::4]], dtype=np.int64)
+    ref_chunks = sorted(chunk_refs)
+    ref_lists = [chunk_refs[chunk] for chunk in ref_chunks]
+    ref_index = np.array([chunk for chunk, refs in zip(ref_chunks, ref_lists) for _ in refs],
+                         dtype=np.int64)
+    ref_ids = np.array([intern(ref.value, len(interned)) for refs in ref_lists for ref in refs],
+                       dtype=np.int64)
+
+    literals = _literal_column(arena, kinds)
+    checked = (kinds[:, 2] == 2) & (kinds[:, 3] == 3) & ~np.equal(literals, None)
+    codes = np.array([_TYPE_CODES.get(typ, _UNKNOWN_TYPE) for typ in values[2::4]], dtype=np.int64)
+    range_faulty = checked & ((codes == _UNKNOWN_TYPE) | _out_of_range(codes, literals, checked))
+
+    registering = has_name & ~range_faulty
+    owner, ref_faulty = _ref_faults(name_ids, registering, ref_index, ref_ids, len(interned), count)
+    positions = np.arange(count)
+    duplicate = has_name & (owner[name_ids] < positions)
+
+    # Участки со ссылками, у которых есть непрошедшие ссылки (объявления-повторы ссылки не проверяют)
+    failed_refs: Dict[int, List[Token]] = {}
+    ref_fails = ~(owner[ref_ids] < ref_index)
+    flat_refs = [ref for refs in ref_lists for ref in refs]
+    for k in np.flatnonzero(ref_fails).tolist():
+        failed_refs.setdefault(int(ref_index[k]), []).append(flat_refs[k])
+
+    reported = np.flatnonzero(duplicate | range_faulty | ref_faulty).tolist()
+    reported.extend(chunk for chunk in failed_refs if chunk >= count)
+    lines, columns = arena.lines, arena.positions
+    sem_errors: List[SemanticError] = []
+    for idx in reported:
+        if idx < count:
+            base = idx * 4
+            if duplicate[idx]:
+                name = values[base + 1]
+                first = int(owner[name_ids[idx]]) * 4 + 1
+                sem_errors.append(SemanticError(
+                    Diagnostic.DUPLICATE_IDENTIFIER,
+                    (name, lines[first]),
+                    lines[base + 1],
+                    columns[base + 1],
+                    fragment=name,
+                ))
+                continue
+            if range_faulty[idx]:
+                row = (None, lines[base + 1], columns[base + 1], lines[base + 2], columns[base + 2],
+                       lines[base + 3], columns[base + 3], values[base + 3])
+                sem_errors.append(_range_error(values[base + 2], literals[idx], row))
+        for ref in failed_refs.get(idx, ()):
+            sem_errors.append(SemanticError(
+                Diagnostic.UNDECLARED_IDENTIFIER,
+                (ref.value,),
+                ref.line,
+                ref.start_pos,
+                fragment=ref.value,
+            ))
+    return count, sem_errors, syntax_errors
+
+
+def _as_arena(syntax_tree: Optional[Union[SyntaxTreeNode, SyntaxArena]]) -> SyntaxArena:
+    if isinstance(syntax_tree, SyntaxArena):
+        return syntax_tree
+    arena = SyntaxArena()
+    if syntax_tree is None:
+        return arena
+    if syntax_tree.node_type != "program":
+        arena.append_node(syntax_tree)
+        return arena
+    for node in syntax_tree.children:
+        if node.node_type == "const_declaration":
+            arena.append_node(node)
+    return arena
+
+
+def _literal_column(arena: SyntaxArena, kinds):
+    """Значения объявлений (объектный массив, None — значения нет), как в _arena_rows."""
+    literals = np.array(arena.literals, dtype=object)
+    has_value = kinds[:, 3] == 3
+    for idx in np.flatnonzero(has_value & np.equal(literals, None)).tolist():
+        # Литерал без декодированного значения
+        literals[idx] = decode_int_literal(arena.values[idx * 4 + 3])
+    literals[~has_value] = None
+    return literals
+
+
+def _out_of_range(codes, literals, checked):
+    """Маска значений вне диапазона своего типа (непроверяемые строки — False).
+
+    Значения, помещающиеся в int64, сравниваются векторно; остальные
+    (литералы i128/u128 и переполнения) — как объекты Python int.
+    """
+    known = checked & (codes >= 0)
+    type_index = np.where(known, codes, 0)
+    values = np.where(known, literals, 0)
+    try:
+        column = values.astype(np.int64)
+        wide = None
+    except OverflowError:
+        wide = np.flatnonzero((values > _INT64_MAX) | (values < _INT64_MIN))
+        values[wide] = 0
+        column = values.astype(np.int64)
+
+    result = known & ((column < _LOW64[type_index]) | (column > _HIGH64[type_index]))
+    if wide is not None:
+        for idx in wide.tolist():
+            lo, hi = TYPE_RANGE[_TYPE_NAMES[codes[idx]]]
+            result[idx] = not (lo <= literals[idx] <= hi)
+    return result
+
+
+def _ref_faults(name_ids, registering, ref_index, ref_ids, name_count, count):
+    """(номер регистрирующего объявления по номеру имени, маска объявлений с непрошедшей ссылкой).
+
+    Ссылка на участке c проходит, если её имя зарегистрировано объявлением
+    раньше c. Объявление с непрошедшей ссылкой само имя не регистрирует,
+    из-за чего регистрирующие объявления сдвигаются дальше и проваливаются
+    новые ссылки; множество таких объявлений только растёт, поэтому повторение
+    до неподвижной точки даёт то же, что последовательный проход.
+    """
+    ref_faulty = np.zeros(count, dtype=bool)
+    in_range = ref_index < count
+    while True:
+        owner = np.full(name_count, _NEVER, dtype=np.int64)
+        candidates = np.flatnonzero(registering & ~ref_faulty)
+        registered, first = np.unique(name_ids[candidates], return_index=True)
+        owner[registered] = candidates[first]
+        if not len(ref_index):
+            return owner, ref_faulty
+        failed = np.zeros(count, dtype=bool)
+        failed[ref_index[in_range & ~(owner[ref_ids] < ref_index)]] = True
+        if (failed == ref_faulty).all():
+            return owner, ref_faulty
+        ref_faulty = failed
@@ -0,0 +1,138 @@
+"""Компактная таблица имён семантического прохода.
+
+Каждое имя интернируется в номер: байты UTF-8 всех имён лежат подряд в одном
+bytearray (границы — в offsets), хеш имени — в array('q'), строка и столбец
+объявления — в array('i'). Поиск — открытая адресация с линейным пробированием
+по массиву номеров, без словаря и отдельных объектов на каждое имя: слот
+с чужим хешем отбрасывается без среза имён, при росте таблицы хеши берутся
+из массива.
+"""
+import sys
+from array import array
+from typing import Iterator, Optional, Tuple
+
+_MIN_CAPACITY = 8
+
+
+def _empty_slots(size: int) -> array:
+    """size пустых слотов хеш-таблицы (0 — свободно, иначе номер имени + 1)."""
+    return array('i', bytes(4 * size))
+
+
+class SymbolTable:
+    """Имя -> номер, строка и столбец объявления.
+
+    Номера выдаются подряд с нуля в порядке add; lines[id] и columns[id] —
+    позиция объявления. Заполненность хеш-таблицы не выше 2/3.
+    """
+
+    def __init__(self, capacity: int = 0):
+        self._names = bytearray()
+        self._offsets = array('I', [0])
+        self._hashes = array('q')
+        self.lines = array('i')
+        self.columns = array('i')
+        size = _MIN_CAPACITY
+        while size * 2 < capacity * 3:
+            size *= 2
+        self._slots = _empty_slots(size)
+        self._mask = size - 1
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def __contains__(self, name: str) -> bool:
+        return self._probe(name)[1] >= 0
+
+    def __getitem__(self, name: str) -> int:
+        """Строка объявления имени (как у словаря имя -> строка семантического прохода)."""
+        symbol = self._probe(name)[1]
+        if symbol < 0:
+            raise KeyError(name)
+        return self.lines[symbol]
+
+    def __iter__(self) -> Iterator[str]:
+        """Имена в порядке номеров."""
+        names, offsets = self._names, self._offsets
+        for symbol in range(len(self.lines)):
+            yield names[offsets[symbol]:offsets[symbol + 1]].decode('utf-8')
+
+    def find(self, name: str) -> Optional[int]:
+        """Номер имени или None, если оно не объявлено."""
+        symbol = self._probe(name)[1]
+        return symbol if symbol >= 0 else None
+
+    def get(self, name: str) -> Optional[Tuple[int, int]]:
+        """(строка, столбец) объявления имени или None."""
+        symbol = self._probe(name)[1]
+        if symbol < 0:
+            return None
+        return self.lines[symbol], self.columns[symbol]
+
+    def name(self, symbol: int) -> str:
+        """Имя по номеру."""
+        if not 0 <= symbol < len(self.lines):
+            raise ValueError(f"Нет имени с номером {symbol}")
+        return self._names[self._offsets[symbol]:self._offsets[symbol + 1]].decode('utf-8')
+
+    def add(self, name: str, line: int, column: int) -> int:
+        """Регистрирует имя и возвращает его номер; уже объявленное имя не меняется."""
+        key = name.encode('utf-8')
+        slot, symbol = self._probe(name, key)
+        if symbol >= 0:
+            return symbol
+        symbol = len(self.lines)
+        self._names += key
+        self._hashes.append(hash(name))
+        try:
+            self._offsets.append(len(self._names))
+        except OverflowError:
+            # Больше 4 ГБ имён: границы переезжают в 64-битный массив
+            self._offsets = array('q', self._offsets)
+            self._offsets.append(len(self._names))
+        self.lines.append(line)
+        self.columns.append(column)
+        self._slots[slot] = symbol + 1
+        if (symbol + 1) * 3 > len(self._slots) * 2:
+            self._grow()
+        return symbol
+
+    @property
+    def nbytes(self) -> int:
+        """Память таблицы вместе с запасом массивов: имена, границы, хеши, позиции и слоты."""
+        return sys.getsizeof(self) + sum(
+            sys.getsizeof(part)
+            for part in (self._names, self._offsets, self._hashes, self.lines, self.columns, self._slots))
+
+    def _probe(self, name: str, key: Optional[bytes] = None) -> Tuple[int, int]:
+        """(слот, номер) для name; номер -1 — имени нет, слот свободен.
+
+        key — name в UTF-8, если уже есть; имена сравниваются как байты
+        и только у слотов с тем же хешем.
+        """
+        names, offsets, hashes, slots, mask = (
+            self._names, self._offsets, self._hashes, self._slots, self._mask)
+        name_hash = hash(name)
+        slot = name_hash & mask
+        while True:
+            entry = slots[slot]
+            if not entry:
+                return slot, -1
+            if hashes[entry - 1] == name_hash:
+                if key is None:
+                    key = name.encode('utf-8')
+                if names[offsets[entry - 1]:offsets[entry]] == key:
+                    return slot, entry - 1
+            slot = (slot + 1) & mask
+
+    def _grow(self) -> None:
+        size = len(self._slots) * 2
+        slots = _empty_slots(size)
+        mask = size - 1
+        for symbol, name_hash in enumerate(self._hashes):
+            slot = name_hash & mask
+            while slots[slot]:
+                slot = (slot + 1) & mask
+            slots[slot] = symbol + 1
+        self._slots = slots
+        self._mask = mask
@@ -0,0 +1,254 @@
+"""Все движки и режимы разбора против эталона: Parser(engine='recursive').parse
+и analyze_semantics_from_parse.
+
+Программы — фрагменты test_const_rules_samples.txt (целиком, по блокам
+и по строкам) и документы, собранные генератором со случайным зерном.
+Запуск: python -m pytest -q test_equivalence.py
+"""
+import os
+import random
+
+import pytest
+
+from external_semantics import analyze_semantics_external
+from incremental import IncrementalParser
+from lexical_analyzer import LexicalAnalyzer
+from parser import _FLOAT_RE, Parser, SyntaxTreeNode
+from semantic_analysis import analyze_semantics, analyze_semantics_from_parse
+from semantic_batch import analyze_semantics_batch
+from symbol_table import SymbolTable
+
+SAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_const_rules_samples.txt")
+
+_TYPES = ("i8", "i16", "i32", "i64", "i128", "u8", "u16", "u32", "u64", "u128")
+# Поломки объявления для генератора: каждая даёт свою ветку восстановления
+_BROKEN = (
+    "const {name}: {type} = ;",
+    "const {name} {type} = {value};",
+    "const {name}: = {value};",
+    "cont {name}: {type} = {value};",
+    "{type} {name}: {type} = {value};",
+    "const ; {name}: {type} = {value};",
+    "const {name}: {type} {value};",
+    "const {name}: {type} = {value}",
+    "const {name}: {type} = {value} @;",
+    ";;",
+    "const {name}: {type} = 0x_FF;",
+)
+
+
+def _sample_programs():
+    with open(SAMPLES, encoding="utf-8") as file:
+        text = file.read()
+    blocks = [block for block in text.split("\n\n") if block.strip()]
+    lines = [line for line in text.split("\n") if line.strip()]
+    return [text] + blocks + lines
+
+
+def _random_program(rnd, broken=0.2):
+    """Документ из объявлений с повторами имён, ссылками, выходом за диапазон
+    и поломками (доля broken строк)."""
+    names = [f"C_{index}" for index in range(rnd.randint(1, 12))]
+    lines = []
+    for _ in range(rnd.randint(1, 30)):
+        name = rnd.choice(names)
+        typ = rnd.choice(_TYPES)
+        value = rnd.choice((
+            str(rnd.randint(0, 300)),
+            str(-rnd.randint(0, 40000)),
+            str(2 ** rnd.choice((7, 8, 15, 16, 31, 32, 63, 64, 127, 128))),
+            rnd.choice(names),
+            "0b1010",
+            "1_000",
+        ))
+        if rnd.random() < broken:
+            line = rnd.choice(_BROKEN).format(name=name, type=typ, value=value)
+        else:
+            line = f"const {name}: {typ} = {value};"
+        if rnd.random() < 0.3 and lines:
+            # Несколько объявлений на одной строке
+            lines[-1] += rnd.choice((" ", "\t", "")) + line
+        else:
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def _random_programs(count=60, seed=2024, broken=0.2):
+    rnd = random.Random(seed)
+    return [_random_program(rnd, broken) for _ in range(count)]
+
+
+PROGRAMS = _sample_programs() + _random_programs()
+RANDOM_PROGRAMS = _random_programs()
+# Только корректные объявления: окно потока всегда режется на чистой границе
+VALID_PROGRAMS = _random_programs(seed=7, broken=0)
+
+
+def _tokens(text, trivia_free=False):
+    return LexicalAnalyzer(skip_trivia=trivia_free).analyze(text)
+
+
+def _has_float(tokens):
+    return any(token.is_error and _FLOAT_RE.fullmatch(token.value) for token in tokens)
+
+
+def _syntax_key(tree, errors):
+    return (str(tree) if tree is not None else None,
+            [(e.fragment, e.line, e.position, e.code, e.args, e.cursor_only) for e in errors])
+
+
+def _semantic_key(errors):
+    return [(e.code, e.args, e.line, e.column, e.fragment) for e in errors]
+
+
+def _reference(tokens, trivia_free=False):
+    return Parser(engine="recursive").parse(tokens, trivia_free)
+
+
+def _reference_semantics(tokens, trivia_free=False):
+    tree, errors = _reference(tokens, trivia_free)
+    _, _, sem_errors, _ = analyze_semantics_from_parse(tokens, tree, errors, trivia_free)
+    return _semantic_key(sem_errors)
+
+
+@pytest.mark.parametrize("engine", LexicalAnalyzer.ENGINES)
+@pytest.mark.parametrize("trivia_free", [False, True])
+def test_lexer_engines(engine, trivia_free):
+    for text in PROGRAMS:
+        expected = LexicalAnalyzer(skip_trivia=trivia_free).analyze(text)
+        got = LexicalAnalyzer(engine=engine, skip_trivia=trivia_free).analyze(text)
+        assert ([(t.type, t.value, t.line, t.start_pos, t.end_pos, t.int_value) for t in got]
+                == [(t.type, t.value, t.line, t.start_pos, t.end_pos, t.int_value) for t in expected]), text
+
+
+@pytest.mark.parametrize("engine", Parser.ENGINES)
+@pytest.mark.parametrize("arena", [False, True])
+@pytest.mark.parametrize("trivia_free", [False, True])
+def test_parser_engines(engine, arena, trivia_free):
+    for text in PROGRAMS:
+        tokens = _tokens(text, trivia_free)
+        expected = _syntax_key(*_reference(tokens, trivia_free))
+        got = Parser(engine=engine, arena=arena).parse(tokens, trivia_free)
+        assert _syntax_key(*got) == expected, text
+
+
+@pytest.mark.parametrize("engine", Parser.ENGINES)
+@pytest.mark.parametrize("min_shard_tokens", [1, 16, 64])
+def test_parse_parallel_shards(engine, min_shard_tokens):
+    # Один документ из всех случайных: у каждого вызова свой пул процессов
+    text = "\n".join(RANDOM_PROGRAMS)
+    tokens = _tokens(text)
+    expected = _syntax_key(*_reference(tokens))
+    got = Parser(engine=engine).parse_parallel(tokens, workers=2, min_shard_tokens=min_shard_tokens)
+    assert _syntax_key(*got) == expected
+
+
+def _streamed(parser, tokens, max_window):
+    """Дерево и ошибки Parser.iter_declarations, собранные как у parse."""
+    root = SyntaxTreeNode("program")
+    errors = []
+    for node, node_errors in parser.iter_declarations(iter(tokens), max_window=max_window):
+        if node is not None:
+            root.children.append(node)
+        errors.extend(node_errors)
+    errors.sort(key=lambda e: (e.line, e.position))
+    return root, errors
+
+
+@pytest.mark.parametrize("engine", Parser.ENGINES)
+@pytest.mark.parametrize("arena", [False, True])
+def test_iter_declarations(engine, arena):
+    for text in PROGRAMS:
+        tokens = _tokens(text)
+        if _has_float(tokens):
+            # Дробные числа поток учитывает только в пределах окна (см. iter_declarations)
+            continue
+        tree, errors = _reference(tokens)
+        root, streamed = _streamed(Parser(engine=engine, arena=arena), tokens, 1 << 16)
+        got_tree = root if root.children or tree is not None else None
+        assert _syntax_key(got_tree, streamed) == _syntax_key(tree, errors), text
+
+
+@pytest.mark.parametrize("engine", Parser.ENGINES)
+@pytest.mark.parametrize("max_window", [16, 64, 256])
+def test_iter_declarations_small_windows(engine, max_window):
+    # Окно без чистой границы режется после ';' — у корректных объявлений это тоже граница
+    for text in VALID_PROGRAMS:
+        tokens = _tokens(text)
+        root, streamed = _streamed(Parser(engine=engine), tokens, max_window)
+        assert _syntax_key(root, streamed) == _syntax_key(*_reference(tokens)), text
+
+
+@pytest.mark.parametrize("segment_lines", [1, 3, 64])
+@pytest.mark.parametrize("engine", Parser.ENGINES)
+def test_incremental_parser_edits(segment_lines, engine):
+    rnd = random.Random(segment_lines)
+    pool = [line for text in RANDOM_PROGRAMS for line in text.split("\n")]
+    for text in RANDOM_PROGRAMS[:20]:
+        session = IncrementalParser(segment_lines=segment_lines, engine=engine)
+        result = session.reset(text)
+        lines = text.split("\n")
+        for _ in range(10):
+            first = rnd.randint(1, len(lines))
+            last = min(len(lines), first + rnd.randint(-1, 2))
+            new_lines = [rnd.choice(pool) for _ in range(rnd.randint(1, 3))]
+            result = session.edit(first, last, "\n".join(new_lines))
+            lines[first - 1:last] = new_lines
+            expected = _reference(_tokens("\n".join(lines)))
+            assert _syntax_key(*result) == _syntax_key(*expected)
+
+
+@pytest.mark.parametrize("segment_lines", [1, 3, 64])
+@pytest.mark.parametrize("engine", Parser.ENGINES)
+def test_incremental_parser_junk(segment_lines, engine):
+    # Документ без объявлений: дерева нет, ошибки — лексические, как у parse
+    for junk in ("$$$", "@@@\n#", "\t$\n\n%%"):
+        session = IncrementalParser(segment_lines=segment_lines, engine=engine)
+        result = session.reset(junk)
+        assert _syntax_key(*result) == _syntax_key(*_reference(_tokens(junk)))
+
+        session = IncrementalParser(segment_lines=segment_lines, engine=engine)
+        session.reset("const A: i8 = 1;\nconst B: u8 = 2;")
+        result = session.update(junk)
+        assert _syntax_key(*result) == _syntax_key(*_reference(_tokens(junk)))
+        result = session.edit(1, 1, "const A: i8 = 1;")
+        expected = _reference(_tokens("\n".join(session.lexer.lines)))
+        assert _syntax_key(*result) == _syntax_key(*expected)
+
+
+@pytest.mark.parametrize("arena", [False, True])
+@pytest.mark.parametrize("trivia_free", [False, True])
+def test_semantic_passes(arena, trivia_free):
+    for text in PROGRAMS:
+        tokens = _tokens(text, trivia_free)
+        expected = _reference_semantics(tokens, trivia_free)
+
+        parser = Parser(engine="table", arena=arena)
+        tree, errors = parser.parse(tokens, trivia_free, collect_refs=True)
+        for options in ({}, {"chunk_refs": parser.chunk_refs}, {"symbols": SymbolTable()}):
+            _, _, sem_errors, _ = analyze_semantics_from_parse(tokens, tree, errors, trivia_free, **options)
+            assert _semantic_key(sem_errors) == expected, (text, options)
+
+        count, sem_errors, _ = analyze_semantics_batch(tokens, tree, errors, trivia_free)
+        assert _semantic_key(sem_errors) == expected, text
+        full_tree = _reference(tokens, trivia_free)[0]
+        assert count == (len(full_tree.children) if full_tree is not None else 0)
+
+    for text in PROGRAMS:
+        _, _, sem_errors, _ = analyze_semantics(text, trivia_free)
+        assert _semantic_key(sem_errors) == _reference_semantics(_tokens(text, trivia_free), trivia_free)
+
+
+@pytest.mark.parametrize("run_size", [1, 4, 1_000_000])
+def test_external_semantics(run_size, tmp_path):
+    for text in PROGRAMS:
+        tokens = _tokens(text)
+        if _has_float(tokens):
+            continue
+        count, sem_errors, syntax_errors = analyze_semantics_external(
+            iter(tokens), run_size=run_size, tmpdir=str(tmp_path))
+        tree, errors = _reference(tokens)
+        assert _semantic_key(sem_errors) == _reference_semantics(tokens), text
+        syntax_errors.sort(key=lambda e: (e.line, e.position))
+        assert _syntax_key(None, syntax_errors) == _syntax_key(None, errors), text
+        assert count == (len(tree.children) if tree is not None else 0)